@@ -1,23 +1,29 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import customtkinter as ctk
-import vlc
 import os
 import time
 import threading
-from PIL import Image, ImageTk, ImageDraw, ImageFont
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque, OrderedDict
+from PIL import Image
 import json
-from pathlib import Path
-import math
 import random
-import mutagen
-from mutagen import File
-import datetime
-import glob
 import io
+import array
+import itertools
+import zlib
+import bisect
+import hashlib
+import queue
+import select
+import struct
 import sys
 import ctypes
-from ctypes import wintypes
+import subprocess
+
+# vlc, mutagen, sqlite3 and PIL.ImageDraw are imported where first used to keep startup fast
 
 # Set modern theme
 ctk.set_appearance_mode("dark")
@@ -127,6 +133,305 @@ class ModernVisualizer(ctk.CTkCanvas):
             self.after_cancel(self.animation_id)
         self.clear_visualizer()
 
+class VirtualTreeview(ttk.Frame):
+    """Treeview that only materializes the rows in view, backed by a sequence of keys"""
+    def __init__(self, parent, columns, get_values, sort_keys=None, **kwargs):
+        super().__init__(parent)
+        self.columns = columns
+        self.get_values = get_values
+        self.sort_keys = sort_keys or {}
+        self.rows = []
+        self.first = 0
+        self.visible_count = 1
+        self.row_height = 20
+        self.header_height = 0
+        self.row_metrics_known = False
+        self.slots = []
+        self.selected_key = None
+        self.sort_column = None
+        self.sort_reverse = False
+        
+        self.tree = ttk.Treeview(self, columns=columns, show="headings",
+                                 selectmode="browse", **kwargs)
+        for col in columns:
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort_by(c))
+        
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", self._on_key_up)
+        self.tree.bind("<Down>", self._on_key_down)
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.visible_count))
+        self.tree.bind("<Next>", lambda e: self.scroll(self.visible_count))
+    
+    def set_rows(self, rows):
+        """Replace the displayed keys, keeping the active sort order"""
+        self.rows = rows
+        if self.sort_column is not None:
+            self._apply_sort()
+        self.refresh()
+    
+    def append_rows(self, keys):
+        """Append keys at the end of the view"""
+        if isinstance(self.rows, range) and keys and keys[0] == self.rows.stop:
+            self.rows = range(self.rows.start, keys[-1] + 1)
+        else:
+            if not isinstance(self.rows, list):
+                self.rows = list(self.rows)
+            self.rows.extend(keys)
+        self.refresh()
+    
+    def resort(self):
+        """Re-apply the active sort after rows were appended"""
+        if self.sort_column is not None:
+            self._apply_sort()
+            self.refresh()
+    
+    def sort_by(self, column):
+        """Sort the view by a column, toggling direction on repeated clicks"""
+        if column not in self.sort_keys:
+            return
+        
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        
+        for col in self.columns:
+            arrow = ""
+            if col == self.sort_column:
+                arrow = " ▼" if self.sort_reverse else " ▲"
+            self.tree.heading(col, text=col + arrow)
+        
+        self._apply_sort()
+        self.refresh()
+    
+    def _apply_sort(self):
+        """Sort the row keys using the active column's key function"""
+        self.rows = sorted(self.rows, key=self.sort_keys[self.sort_column],
+                           reverse=self.sort_reverse)
+    
+    def refresh(self):
+        """Fill the visible slots with the rows currently in view"""
+        total = len(self.rows)
+        self.first = max(0, min(self.first, total - self.visible_count))
+        needed = min(self.visible_count, total - self.first)
+        
+        while len(self.slots) < needed:
+            self.slots.append(self.tree.insert("", "end"))
+        while len(self.slots) > needed:
+            self.tree.delete(self.slots.pop())
+        
+        selected_slot = None
+        for offset, item in enumerate(self.slots):
+            key = self.rows[self.first + offset]
+            self.tree.item(item, values=self.get_values(key))
+            if key == self.selected_key:
+                selected_slot = item
+        
+        if selected_slot is not None:
+            self.tree.selection_set(selected_slot)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+        
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + needed) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        
+        # Row metrics can only be measured once a row is on screen
+        if not self.row_metrics_known and self._measure_rows():
+            self._update_visible_count(self.tree.winfo_height())
+    
+    def scroll(self, amount):
+        """Scroll the view by a number of rows"""
+        self.first += amount
+        self.refresh()
+        return "break"
+    
+    def visible_keys(self):
+        """Return the keys of the rows currently on screen"""
+        return self.rows[self.first:self.first + self.visible_count]
+    
+    def key_at(self, y):
+        """Return the key of the row at a y coordinate, or None"""
+        item = self.tree.identify_row(y)
+        if item in self.slots:
+            return self.rows[self.first + self.slots.index(item)]
+        return None
+    
+    def select_key(self, key):
+        """Select the row for a key"""
+        self.selected_key = key
+        self.refresh()
+    
+    def clear_selection(self):
+        """Clear the selected row"""
+        self.selected_key = None
+        self.refresh()
+    
+    def _on_resize(self, event):
+        """Recompute how many rows fit after a resize"""
+        self._update_visible_count(event.height)
+    
+    def _measure_rows(self):
+        """Measure header and row height from the first slot"""
+        if not self.slots:
+            return False
+        
+        bbox = self.tree.bbox(self.slots[0])
+        if not bbox:
+            return False
+        
+        self.header_height = bbox[1]
+        self.row_height = max(1, bbox[3])
+        self.row_metrics_known = True
+        return True
+    
+    def _update_visible_count(self, height):
+        """Resize the slot pool to the number of rows that fit"""
+        visible = max(1, (height - self.header_height) // self.row_height)
+        if visible != self.visible_count:
+            self.visible_count = visible
+            self.refresh()
+    
+    def _on_select(self, event):
+        """Track the selected key when the user picks a row"""
+        selection = self.tree.selection()
+        if selection and selection[0] in self.slots:
+            self.selected_key = self.rows[self.first + self.slots.index(selection[0])]
+    
+    def _on_scrollbar(self, *args):
+        """Handle scrollbar drags and clicks"""
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= max(1, self.visible_count - 1)
+            self.first += amount
+        self.refresh()
+    
+    def _on_mousewheel(self, event):
+        """Scroll three rows per wheel notch"""
+        notches = event.delta / 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll(int(-3 * notches) or (-1 if event.delta > 0 else 1))
+    
+    def _on_key_up(self, event):
+        """Scroll up when moving the selection past the top visible row"""
+        if self.slots and self.tree.focus() == self.slots[0] and self.first > 0:
+            self.selected_key = self.rows[self.first - 1]
+            self.scroll(-1)
+    
+    def _on_key_down(self, event):
+        """Scroll down when moving the selection past the bottom visible row"""
+        if self.slots and self.tree.focus() == self.slots[-1]:
+            last = self.first + len(self.slots)
+            if last < len(self.rows):
+                self.selected_key = self.rows[last]
+                self.scroll(1)
+
+class VirtualAlbumGrid(ctk.CTkFrame):
+    """Album grid that only creates cards near the viewport and reuses them while scrolling"""
+    CARD_WIDTH = 180
+    CARD_HEIGHT = 220
+    PADDING = 10
+    
+    def __init__(self, parent, create_card, fill_card, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.create_card = create_card
+        self.fill_card = fill_card
+        self.keys = []
+        self.columns = 1
+        self.visible = {}   # album index -> (card, canvas window id)
+        self.spare = []     # hidden (card, canvas window id) pairs ready for reuse
+        
+        self.canvas = tk.Canvas(self, bg=MintGreenTheme.COLORS["dark_bg"], highlightthickness=0,
+                                yscrollincrement=20)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.canvas.bind("<Configure>", lambda e: self.refresh())
+        self.bind_scroll(self.canvas)
+    
+    def bind_scroll(self, widget):
+        """Scroll the grid when the mouse wheel is used over a widget"""
+        widget.bind("<MouseWheel>", self._on_mousewheel)
+        widget.bind("<Button-4>", lambda e: self._scroll(-3))
+        widget.bind("<Button-5>", lambda e: self._scroll(3))
+    
+    def set_albums(self, keys, changed=None):
+        """Replace the album keys and refill visible cards (only moved ones and those in changed, if given)"""
+        self.keys = keys
+        self.refresh(refill=changed is None, changed=changed or ())
+    
+    def refresh(self, refill=False, changed=()):
+        """Place cards for the albums near the viewport, recycling the rest"""
+        cell_width = self.CARD_WIDTH + 2 * self.PADDING
+        cell_height = self.CARD_HEIGHT + 2 * self.PADDING
+        self.columns = max(1, self.canvas.winfo_width() // cell_width)
+        rows = -(-len(self.keys) // self.columns)
+        self.canvas.configure(scrollregion=(0, 0, self.columns * cell_width, rows * cell_height))
+        
+        # One row of overscan above and below the viewport
+        top = self.canvas.canvasy(0)
+        first_row = max(0, int(top // cell_height) - 1)
+        last_row = int((top + self.canvas.winfo_height()) // cell_height) + 1
+        wanted = range(first_row * self.columns,
+                       min(len(self.keys), (last_row + 1) * self.columns))
+        
+        for index in list(self.visible):
+            if index not in wanted:
+                card, window = self.visible.pop(index)
+                self.canvas.itemconfigure(window, state="hidden")
+                self.spare.append((card, window))
+        
+        for index in wanted:
+            entry = self.visible.get(index)
+            if entry is None:
+                entry = self.spare.pop() if self.spare else self._new_card()
+                self.visible[index] = entry
+                self.canvas.itemconfigure(entry[1], state="normal")
+            
+            card, window = entry
+            row, col = divmod(index, self.columns)
+            self.canvas.coords(window, col * cell_width + self.PADDING, row * cell_height + self.PADDING)
+            if refill or card.key != self.keys[index] or card.key in changed:
+                card.key = self.keys[index]
+                self.fill_card(card, card.key)
+    
+    def _new_card(self):
+        """Create a card widget and its canvas window"""
+        card = self.create_card(self.canvas)
+        card.key = None
+        window = self.canvas.create_window(0, 0, window=card, anchor="nw")
+        return card, window
+    
+    def _scroll(self, amount):
+        """Scroll by a number of units and update the cards"""
+        self.canvas.yview_scroll(amount, "units")
+        self.refresh()
+    
+    def _on_scrollbar(self, *args):
+        """Handle scrollbar drags and clicks"""
+        self.canvas.yview(*args)
+        self.refresh()
+    
+    def _on_mousewheel(self, event):
+        """Handle mousewheel scrolling"""
+        notches = event.delta / 120 if abs(event.delta) >= 120 else event.delta
+        self._scroll(int(-3 * notches) or (-1 if event.delta > 0 else 1))
+
 class StudyTimer:
     """Pomodoro-style study timer for students"""
     def __init__(self):
@@ -170,71 +475,2167 @@ class StudyTimer:
 
 class PlaylistManager:
     """Manage playlists for the media player"""
-    def __init__(self):
+    def __init__(self, path="playlists.json", journal_path="playlists.journal", flush_interval=2.0):
+        self.path = path
+        self.journal_path = journal_path
+        # name -> {song path: None}: an ordered set with O(1) membership, insert and delete
         self.playlists = {}
         self.current_playlist = "Main Playlist"
+        self.lock = threading.RLock()
+        # Changes are appended to a journal and folded into the JSON snapshot now and then
+        self.journal = None
+        self.journal_entries = 0
+        self.min_compact_entries = 1000
         self.load_playlists()
+        
+        # Write-behind: callers only touch memory, a background thread does the disk work
+        self.pending_lines = []
+        self.flush_interval = flush_interval
+        self.io_lock = threading.Lock()
+        self.dirty = threading.Event()
+        self.stopped = threading.Event()
+        self.writer = threading.Thread(target=self._writer_loop, name="playlist-writer", daemon=True)
+        self.writer.start()
+    
+    def create_playlist(self, name):
+        """Create a new playlist"""
+        return self._record(["create", name])
+    
+    def delete_playlist(self, name):
+        """Delete a playlist"""
+        return self._record(["delete", name])
+    
+    def add_to_playlist(self, playlist_name, song_path):
+        """Add a song to a playlist"""
+        return self._record(["add", playlist_name, [song_path]])
+    
+    def add_many_to_playlist(self, playlist_name, song_paths):
+        """Add several songs to a playlist as one journal entry"""
+        song_paths = list(song_paths)
+        if not song_paths:
+            return False
+        return self._record(["add", playlist_name, song_paths])
+    
+    def remove_from_playlist(self, playlist_name, song_path):
+        """Remove a song from a playlist"""
+        return self._record(["remove", playlist_name, [song_path]])
+    
+    def remove_from_all_playlists(self, song_paths):
+        """Remove songs from every playlist that has them; return how many playlists changed"""
+        song_paths = list(song_paths)
+        with self.lock:
+            names = list(self.playlists)
+        return sum(self._record(["remove", name, song_paths]) for name in names)
+    
+    def _record(self, entry):
+        """Apply a change in memory and queue its journal line; return True if anything changed"""
+        with self.lock:
+            entry = self._apply(entry)
+            if entry is None:
+                return False
+            self.pending_lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.journal_entries += 1
+        self.dirty.set()
+        return True
+    
+    def _apply(self, entry):
+        """Apply one journal entry in memory; return the entry as it took effect, or None"""
+        op, name = entry[0], entry[1]
+        if op == "create":
+            if name in self.playlists:
+                return None
+            self.playlists[name] = {}
+            return entry
+        
+        if op == "delete":
+            if name not in self.playlists or name == "Main Playlist":
+                return None
+            del self.playlists[name]
+            return entry
+        
+        songs = self.playlists.get(name)
+        if songs is None:
+            return None
+        
+        if op == "add":
+            added = []
+            for song_path in map(normalize_path, entry[2]):
+                if song_path not in songs:
+                    songs[song_path] = None
+                    added.append(song_path)
+            return ["add", name, added] if added else None
+        
+        if op == "remove":
+            removed = []
+            for song_path in map(normalize_path, entry[2]):
+                if song_path in songs:
+                    del songs[song_path]
+                    removed.append(song_path)
+            return ["remove", name, removed] if removed else None
+        
+        return None
+    
+    def _writer_loop(self):
+        """Background thread: flush at most once per interval while there are changes"""
+        while not self.stopped.is_set():
+            self.dirty.wait()
+            # Let more changes pile up so a bulk import turns into a few writes
+            if self.stopped.wait(self.flush_interval):
+                break
+            self.dirty.clear()
+            self.flush()
+    
+    def flush(self, compact=False):
+        """Write queued journal lines, or a full snapshot once the journal outgrows it"""
+        with self.io_lock:
+            with self.lock:
+                lines = self.pending_lines
+                self.pending_lines = []
+                # Rewriting the snapshot costs O(songs), so only do it after as many appends
+                total = sum(len(songs) for songs in self.playlists.values())
+                if self.journal_entries >= max(self.min_compact_entries, total):
+                    compact = True
+                snapshot = None
+                if compact:
+                    snapshot = self._snapshot()
+                    self.journal_entries = 0
+            
+            if snapshot is not None:
+                self._write_snapshot(snapshot)
+            elif lines:
+                try:
+                    if self.journal is None:
+                        self.journal = open(self.journal_path, "a", encoding='utf-8')
+                    self.journal.write("".join(lines))
+                    self.journal.flush()
+                except Exception as e:
+                    print(f"Error saving playlists: {e}")
+    
+    def _snapshot(self):
+        """Copy the playlists as plain lists for JSON (lock must be held)"""
+        return {name: list(songs) for name, songs in self.playlists.items()}
+    
+    def save_playlists(self):
+        """Write a full snapshot now and start an empty journal"""
+        self.flush(compact=True)
+    
+    def _write_snapshot(self, playlists):
+        """Replace the snapshot atomically through a temp file, then truncate the journal"""
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding='utf-8') as f:
+                json.dump(playlists, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            
+            # Journal entries are idempotent, so a crash before this truncation is harmless
+            if self.journal is not None:
+                self.journal.close()
+            self.journal = open(self.journal_path, "w", encoding='utf-8')
+        except Exception as e:
+            print(f"Error saving playlists: {e}")
+    
+    def load_playlists(self):
+        """Load the snapshot, then replay the journal written since"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding='utf-8') as f:
+                    self.playlists = {name: dict.fromkeys(map(normalize_path, songs))
+                                      for name, songs in json.load(f).items()}
+        except:
+            # Create default main playlist
+            self.playlists = {"Main Playlist": {}}
+        
+        torn = False
+        try:
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, "r", encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            torn = True   # partial final line from a crash
+                            break
+                        self._apply(entry)
+                        self.journal_entries += 1
+        except Exception as e:
+            print(f"Error reading playlist journal: {e}")
+        
+        if torn:
+            # Never append after a torn line; fold what was readable into the snapshot
+            self._write_snapshot(self._snapshot())
+            self.journal_entries = 0
+    
+    def close(self):
+        """Stop the writer, fold the journal into the snapshot and close it"""
+        self.stopped.set()
+        self.dirty.set()
+        self.writer.join()
+        self.flush(compact=self.journal_entries > 0)
+        with self.io_lock:
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
+
+def normalize_path(path):
+    """Canonical spelling of a path, so Track.path and every lookup key agree (e.g. / vs \\ on Windows)"""
+    return os.path.normpath(path)
+
+def is_deleted(path):
+    """True only if path is missing from a folder that can still be listed, so unplugged or locked media isn't a deletion"""
+    try:
+        os.stat(path)
+        return False
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return False
+    try:
+        with os.scandir(os.path.dirname(path)):
+            return True
+    except OSError:
+        return False
+
+class Track:
+    """Compact library record with interned strings, integer duration and a shared folder prefix"""
+    __slots__ = ('folder', 'filename', 'title', 'artist', 'album', 'seconds', 'art')
+    
+    def __init__(self, path, title, artist, album, seconds=0, art=None):
+        folder, filename = os.path.split(path)
+        # Tracks in the same folder, by the same artist or on the same album share one string
+        self.folder = sys.intern(folder)
+        self.filename = filename
+        self.title = title
+        self.artist = sys.intern(artist)
+        self.album = sys.intern(album)
+        self.seconds = int(seconds)
+        # Hash of the embedded cover: '' when the file has none, None when not known yet
+        self.art = sys.intern(art) if art else art
+    
+    def __reduce__(self):
+        # Rebuild through __init__ so tracks from a process pool get interned strings
+        return (Track, (self.path, self.title, self.artist, self.album, self.seconds, self.art))
+    
+    @classmethod
+    def from_parts(cls, folder, filename, title, artist, album, seconds, art):
+        """Build a track from stored fields whose shared strings are already interned"""
+        track = cls.__new__(cls)
+        track.folder = folder
+        track.filename = filename
+        track.title = title
+        track.artist = artist
+        track.album = album
+        track.seconds = seconds
+        track.art = art
+        return track
+    
+    @property
+    def path(self):
+        return os.path.join(self.folder, self.filename)
+    
+    @property
+    def duration(self):
+        return f"{self.seconds // 60}:{self.seconds % 60:02d}"
+
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.ogg', '.flac', '.m4a', '.aac'}
+
+def iter_audio_files(folder_path, keep_going=None):
+    """Yield audio file paths under a folder as soon as they are discovered"""
+    pending = [folder_path]
+    while pending:
+        if keep_going and not keep_going():
+            return
+        
+        directory = pending.pop()
+        subdirs = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS:
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"Error scanning {directory}: {e}")
+            continue
+        
+        # Visit subfolders top-down in listing order, like os.walk
+        pending.extend(reversed(subdirs))
+
+# Raw tag keys per field: ID3, MP4, Vorbis/FLAC, APEv2/ASF
+TAG_KEYS = {
+    'title': ('TIT2', '\xa9nam', 'title', 'Title'),
+    'artist': ('TPE1', '\xa9ART', 'artist', 'Artist', 'Author'),
+    'album': ('TALB', '\xa9alb', 'album', 'Album', 'WM/AlbumTitle'),
+}
+
+def _tag_text(tags, field):
+    """First non-empty text value for a field from raw (non-easy) tags"""
+    for key in TAG_KEYS[field]:
+        try:
+            value = tags.get(key)
+        except Exception:
+            continue
+        if value is None:
+            continue
+        value = getattr(value, 'text', value)   # ID3 frames keep their strings in .text
+        if isinstance(value, (list, tuple)):
+            value = value[0] if value else None
+        value = getattr(value, 'value', value)  # ASF attributes
+        if value:
+            return str(value)
+    return None
+
+def iter_embedded_pictures(audio):
+    """Yield the raw bytes of each picture embedded in a parsed file"""
+    # Method 1: FLAC picture blocks
+    for picture in getattr(audio, 'pictures', None) or ():
+        yield picture.data
+    
+    # Method 2: APIC frames (ID3v2) and covr atoms (MP4)
+    tags = getattr(audio, 'tags', None)
+    if tags:
+        for tag in list(tags.keys()):
+            if 'APIC' in tag or 'covr' in tag or 'picture' in tag.lower():
+                try:
+                    value = tags[tag]
+                    if isinstance(value, list):
+                        for cover in value:
+                            yield bytes(cover)
+                    else:
+                        yield value.data
+                except Exception:
+                    continue
+
+def _make_track(file_path, title, artist, album, seconds, picture):
+    """Build (Track, picture) from parsed tags, filling in the usual defaults"""
+    # Keep the cover so album art never has to parse this file again
+    art = hashlib.sha1(picture).hexdigest() if picture else ''
+    title = title or os.path.splitext(os.path.basename(file_path))[0]
+    track = Track(file_path, title[:100], (artist or "Unknown Artist")[:50],
+                  (album or "Unknown Album")[:50], seconds, art)
+    return track, picture
+
+def open_audio(file_path):
+    """mutagen.File, importing mutagen the first time a file needs it"""
+    from mutagen import File
+    return File(file_path)
+
+def read_tags(file_path, fast=False):
+    """Parse a file once and return (Track, embedded picture bytes or None)"""
+    if fast:
+        result = read_tags_fast(file_path)
+        if result is not None:
+            return result
+    
+    try:
+        audio = open_audio(file_path)
+        
+        title = None
+        artist = None
+        album = None
+        total_seconds = 0
+        picture = None
+        
+        if audio is not None:
+            tags = getattr(audio, 'tags', None)
+            if tags:
+                title = _tag_text(tags, 'title')
+                artist = _tag_text(tags, 'artist')
+                album = _tag_text(tags, 'album')
+            
+            if hasattr(audio.info, 'length') and audio.info.length:
+                total_seconds = int(audio.info.length)
+            
+            picture = next(iter_embedded_pictures(audio), None)
+        
+        return _make_track(file_path, title, artist, album, total_seconds, picture)
+        
+    except:
+        title = os.path.splitext(os.path.basename(file_path))[0]
+        return Track(file_path, title[:100], "Unknown Artist", "Unknown Album"), None
+
+# Header-only tag readers for bulk imports. Each reads just the tag and stream
+# headers and returns (fields, seconds, picture), or None to fall back to mutagen.
+FAST_TAG_LIMIT = 16 * 1024 * 1024
+ID3_FIELDS = {'TIT2': 'title', 'TPE1': 'artist', 'TALB': 'album'}
+ID3_ENCODINGS = {0: 'latin-1', 1: 'utf-16', 2: 'utf-16-be', 3: 'utf-8'}
+VORBIS_FIELDS = {'title', 'artist', 'album'}
+MP4_FIELDS = {b'\xa9nam': 'title', b'\xa9ART': 'artist', b'\xa9alb': 'album'}
+MPEG_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MPEG_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 3: (11025, 12000, 8000)}
+ADTS_SAMPLE_RATES = (96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050,
+                     16000, 12000, 11025, 8000, 7350)
+
+def _syncsafe(data):
+    """Decode a 28-bit ID3 syncsafe integer"""
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+def _id3_text(frame):
+    """First string of an ID3 text frame"""
+    return frame[1:].decode(ID3_ENCODINGS[frame[0]]).split('\x00')[0]
+
+def _id3_picture(frame):
+    """Image bytes of an APIC frame"""
+    pos = frame.index(b'\x00', 1) + 2   # skip the MIME type and picture type
+    if frame[0] in (1, 2):
+        # UTF-16 descriptions end with an aligned double null
+        while frame[pos:pos + 2] != b'\x00\x00':
+            pos += 2
+            if pos >= len(frame):
+                raise ValueError("unterminated APIC description")
+        return frame[pos + 2:]
+    return frame[frame.index(b'\x00', pos) + 1:]
+
+def _read_id3v2(f):
+    """Read a leading ID3v2.3/2.4 tag: (fields, picture, audio offset), or None if unusual"""
+    header = f.read(10)
+    if header[:3] != b'ID3':
+        return {}, None, 0
+    
+    version, flags = header[3], header[5]
+    if version not in (3, 4) or flags & 0x80 or any(b & 0x80 for b in header[6:10]):
+        return None
+    size = _syncsafe(header[6:10])
+    if size > FAST_TAG_LIMIT:
+        return None
+    body = f.read(size)
+    if len(body) < size:
+        return None
+    
+    pos = 0
+    if flags & 0x40:
+        # Skip the extended header
+        pos = _syncsafe(body[:4]) if version == 4 else int.from_bytes(body[:4], 'big') + 4
+    
+    fields = {}
+    picture = None
+    while pos + 10 <= size:
+        frame_id = body[pos:pos + 4]
+        if not frame_id.isalnum():
+            break   # padding
+        if version == 4:
+            if any(b & 0x80 for b in body[pos + 4:pos + 8]):
+                return None
+            frame_size = _syncsafe(body[pos + 4:pos + 8])
+            encoded = body[pos + 9] & 0x4F   # grouping, compression, encryption, unsync, length
+        else:
+            frame_size = int.from_bytes(body[pos + 4:pos + 8], 'big')
+            encoded = body[pos + 9] & 0xE0   # compression, encryption, grouping
+        pos += 10
+        if pos + frame_size > size:
+            return None
+        
+        field = ID3_FIELDS.get(frame_id.decode('latin-1'))
+        if field is not None or (frame_id == b'APIC' and picture is None):
+            if encoded:
+                return None
+            frame = body[pos:pos + frame_size]
+            if field is None:
+                picture = _id3_picture(frame)
+            elif field not in fields:
+                fields[field] = _id3_text(frame)
+        pos += frame_size
+    
+    return fields, picture, 10 + size + (10 if flags & 0x10 else 0)
+
+def _read_id3v1(f, file_size, fields):
+    """Fill missing fields from a trailing ID3v1 tag; return its size"""
+    if file_size < 128:
+        return 0
+    f.seek(file_size - 128)
+    tag = f.read(128)
+    if tag[:3] != b'TAG':
+        return 0
+    
+    for field, start in (('title', 3), ('artist', 33), ('album', 63)):
+        value = tag[start:start + 30].split(b'\x00')[0].strip().decode('latin-1')
+        if value and field not in fields:
+            fields[field] = value
+    return 128
+
+def _mpeg_frame(buf, pos):
+    """Parse an MPEG audio frame header: (version, layer, bitrate, sample rate, frame bytes) or None"""
+    if buf[pos] != 0xFF or buf[pos + 1] & 0xE0 != 0xE0:
+        return None
+    version = (3, None, 2, 1)[(buf[pos + 1] >> 3) & 3]   # 3 stands for MPEG 2.5
+    layer = (None, 3, 2, 1)[(buf[pos + 1] >> 1) & 3]
+    bitrate_index = buf[pos + 2] >> 4
+    rate_index = (buf[pos + 2] >> 2) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    
+    bitrate = MPEG_BITRATES[(min(version, 2), layer)][bitrate_index] * 1000
+    sample_rate = MPEG_SAMPLE_RATES[version][rate_index]
+    padding = (buf[pos + 2] >> 1) & 1
+    if layer == 1:
+        frame_bytes = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and version != 1:
+        frame_bytes = 72 * bitrate // sample_rate + padding
+    else:
+        frame_bytes = 144 * bitrate // sample_rate + padding
+    return version, layer, bitrate, sample_rate, frame_bytes
+
+def _fast_mp3(f, file_size):
+    """ID3v2/ID3v1 tags and length from the first MPEG frame (Xing/VBRI or CBR)"""
+    parsed = _read_id3v2(f)
+    if parsed is None:
+        return None
+    fields, picture, start = parsed
+    audio_end = file_size - _read_id3v1(f, file_size, fields)
+    
+    f.seek(start)
+    buf = f.read(8192)
+    for pos in range(len(buf) - 4):
+        frame = _mpeg_frame(buf, pos)
+        if frame is None:
+            continue
+        # Require the next frame to line up so a stray 0xFF isn't taken for a header
+        following = pos + frame[4]
+        if following + 4 <= len(buf) and _mpeg_frame(buf, following) is None:
+            continue
+        break
+    else:
+        return None
+    
+    version, layer, bitrate, sample_rate, _ = frame
+    samples_per_frame = 384 if layer == 1 else (1152 if layer == 2 or version == 1 else 576)
+    mono = buf[pos + 3] >> 6 == 3
+    side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+    xing = pos + 4 + side_info
+    
+    frames = None
+    if buf[xing:xing + 4] in (b'Xing', b'Info') and buf[xing + 7] & 1:
+        frames = int.from_bytes(buf[xing + 8:xing + 12], 'big')
+    elif buf[pos + 36:pos + 40] == b'VBRI':
+        frames = int.from_bytes(buf[pos + 50:pos + 54], 'big')
+    
+    if frames:
+        seconds = frames * samples_per_frame / sample_rate
+    else:
+        seconds = (audio_end - start - pos) * 8 / bitrate
+    return fields, seconds, picture
+
+def _read_vorbis_comment(data, fields):
+    """Collect title/artist/album from a Vorbis comment block"""
+    pos = 4 + int.from_bytes(data[:4], 'little')   # skip the vendor string
+    count = int.from_bytes(data[pos:pos + 4], 'little')
+    pos += 4
+    for _ in range(count):
+        length = int.from_bytes(data[pos:pos + 4], 'little')
+        pos += 4
+        if pos + length > len(data):
+            raise ValueError("truncated Vorbis comment")
+        key, _, value = data[pos:pos + length].partition(b'=')
+        pos += length
+        key = key.decode('ascii', 'replace').lower()
+        if key in VORBIS_FIELDS and key not in fields:
+            fields[key] = value.decode('utf-8', 'replace')
+
+def _fast_flac(f, file_size):
+    """STREAMINFO, VORBIS_COMMENT and the first PICTURE block"""
+    if f.read(4) != b'fLaC':
+        return None
+    
+    fields = {}
+    seconds = 0
+    picture = None
+    last = False
+    while not last:
+        header = f.read(4)
+        if len(header) < 4:
+            return None
+        last = header[0] & 0x80
+        block_type = header[0] & 0x7F
+        length = int.from_bytes(header[1:4], 'big')
+        if block_type == 127:
+            return None
+        
+        if block_type in (0, 4) or (block_type == 6 and picture is None):
+            data = f.read(length)
+            if len(data) < length:
+                return None
+            if block_type == 0:
+                sample_rate = int.from_bytes(data[10:13], 'big') >> 4
+                total_samples = int.from_bytes(data[13:18], 'big') & 0xFFFFFFFFF
+                if sample_rate:
+                    seconds = total_samples / sample_rate
+            elif block_type == 4:
+                _read_vorbis_comment(data, fields)
+            else:
+                pos = 4
+                pos += 4 + int.from_bytes(data[pos:pos + 4], 'big')   # MIME type
+                pos += 4 + int.from_bytes(data[pos:pos + 4], 'big')   # description
+                pos += 16                                             # dimensions and colours
+                picture_length = int.from_bytes(data[pos:pos + 4], 'big')
+                picture = data[pos + 4:pos + 4 + picture_length]
+        else:
+            f.seek(length, 1)
+    
+    return fields, seconds, picture
+
+def _fast_ogg(f, file_size):
+    """Vorbis identification and comment packets, length from the last page"""
+    packets = []
+    parts = []
+    serial = None
+    total = 0
+    while len(packets) < 2:
+        header = f.read(27)
+        if len(header) < 27 or header[:4] != b'OggS':
+            return None
+        if serial is None:
+            serial = header[14:18]
+        elif header[14:18] != serial:
+            return None   # multiplexed streams
+        
+        lacing = f.read(header[26])
+        body = f.read(sum(lacing))
+        pos = 0
+        for value in lacing:
+            parts.append(body[pos:pos + value])
+            pos += value
+            if value < 255:
+                packets.append(b''.join(parts))
+                parts = []
+        total += pos
+        if total > FAST_TAG_LIMIT:
+            return None
+    
+    identification, comment = packets[0], packets[1]
+    if identification[:7] != b'\x01vorbis' or comment[:7] != b'\x03vorbis':
+        return None   # Opus, FLAC-in-Ogg and friends go through mutagen
+    sample_rate = int.from_bytes(identification[12:16], 'little')
+    fields = {}
+    _read_vorbis_comment(comment[7:], fields)
+    
+    f.seek(max(0, file_size - 65536))
+    tail = f.read()
+    index = tail.rfind(b'OggS')
+    if index < 0 or tail[index + 14:index + 18] != serial or not sample_rate:
+        return None
+    granule = int.from_bytes(tail[index + 6:index + 14], 'little', signed=True)
+    if granule < 0:
+        return None
+    return fields, granule / sample_rate, None
+
+def _fast_wav(f, file_size):
+    """RIFF fmt/data chunk sizes and an optional id3 chunk"""
+    header = f.read(12)
+    if header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+        return None
+    
+    fields = {}
+    picture = None
+    sample_rate = block_align = 0
+    data_size = None
+    pos = 12
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        chunk = f.read(8)
+        chunk_id = chunk[:4]
+        size = int.from_bytes(chunk[4:8], 'little')
+        if chunk_id == b'fmt ':
+            fmt = f.read(min(size, 40))
+            audio_format = int.from_bytes(fmt[0:2], 'little')
+            if audio_format == 0xFFFE and len(fmt) >= 26:
+                # WAVE_FORMAT_EXTENSIBLE: the real format leads the sub-format GUID
+                audio_format = int.from_bytes(fmt[24:26], 'little')
+            if audio_format != 1:
+                return None   # compressed audio has no fixed frame size, let mutagen handle it
+            sample_rate = int.from_bytes(fmt[4:8], 'little')
+            block_align = int.from_bytes(fmt[12:14], 'little')
+        elif chunk_id == b'data':
+            data_size = size
+        elif chunk_id in (b'id3 ', b'ID3 '):
+            if size > FAST_TAG_LIMIT:
+                return None
+            parsed = _read_id3v2(io.BytesIO(f.read(size)))
+            if parsed is None:
+                return None
+            fields, picture, _ = parsed
+        pos += 8 + size + (size & 1)
+    
+    if data_size is None or not sample_rate or not block_align:
+        return None
+    return fields, data_size / block_align / sample_rate, picture
+
+def _mp4_atoms(data, start, end):
+    """Yield (type, payload start, end) for the atoms in data[start:end]"""
+    pos = start
+    while pos + 8 <= end:
+        size = int.from_bytes(data[pos:pos + 4], 'big')
+        header = 8
+        if size == 1:
+            size = int.from_bytes(data[pos + 8:pos + 16], 'big')
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise ValueError("bad MP4 atom size")
+        yield data[pos + 4:pos + 8], pos + header, pos + size
+        pos += size
+
+def _mp4_duration(data, pos):
+    """Seconds from an mvhd/mdhd payload"""
+    if data[pos] == 1:
+        timescale = int.from_bytes(data[pos + 20:pos + 24], 'big')
+        duration = int.from_bytes(data[pos + 24:pos + 32], 'big')
+    else:
+        timescale = int.from_bytes(data[pos + 12:pos + 16], 'big')
+        duration = int.from_bytes(data[pos + 16:pos + 20], 'big')
+    return duration / timescale if timescale else 0
+
+def _fast_mp4(f, file_size):
+    """moov atom only: audio track length and the iTunes ilst items"""
+    moov = None
+    pos = 0
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        header = f.read(16)
+        size = int.from_bytes(header[:4], 'big')
+        kind = header[4:8]
+        if size == 1:
+            size = int.from_bytes(header[8:16], 'big')
+        elif size == 0:
+            size = file_size - pos
+        if size < 8 or (pos == 0 and kind != b'ftyp'):
+            return None
+        if kind == b'moov':
+            if size > FAST_TAG_LIMIT:
+                return None
+            f.seek(pos)
+            moov = f.read(size)
+            break
+        pos += size   # step over mdat without reading it
+    if moov is None:
+        return None
+    
+    fields = {}
+    seconds = None
+    picture = None
+    _, start, end = next(_mp4_atoms(moov, 0, len(moov)))
+    for kind, start, end in _mp4_atoms(moov, start, end):
+        if kind == b'trak' and seconds is None:
+            for _, media, media_end in _mp4_atoms(moov, start, end):
+                if moov[media - 4:media] != b'mdia':
+                    continue
+                children = {kind: begin for kind, begin, _ in _mp4_atoms(moov, media, media_end)}
+                hdlr = children.get(b'hdlr')
+                if hdlr is not None and moov[hdlr + 8:hdlr + 12] == b'soun' and b'mdhd' in children:
+                    seconds = _mp4_duration(moov, children[b'mdhd'])
+        elif kind == b'udta':
+            for kind, meta, meta_end in _mp4_atoms(moov, start, end):
+                if kind != b'meta':
+                    continue
+                if moov[meta + 4:meta + 8] != b'hdlr':
+                    meta += 4   # full atom: version and flags
+                for kind, ilst, ilst_end in _mp4_atoms(moov, meta, meta_end):
+                    if kind != b'ilst':
+                        continue
+                    for name, item, item_end in _mp4_atoms(moov, ilst, ilst_end):
+                        field = MP4_FIELDS.get(name)
+                        if field is None and name != b'covr':
+                            continue
+                        for kind, value, value_end in _mp4_atoms(moov, item, item_end):
+                            if kind != b'data':
+                                continue
+                            payload = moov[value + 8:value_end]
+                            if name == b'covr':
+                                picture = picture or payload
+                            elif field not in fields:
+                                if moov[value + 1:value + 4] != b'\x00\x00\x01':
+                                    return None   # not UTF-8 text
+                                fields[field] = payload.decode('utf-8')
+                            break
+    
+    if seconds is None:
+        return None   # no audio track
+    return fields, seconds, picture
+
+def _fast_aac(f, file_size):
+    """ADTS frame headers (mutagen reads no tags from raw AAC either)"""
+    parsed = _read_id3v2(f)
+    if parsed is None:
+        return None
+    start = parsed[2]
+    
+    f.seek(start)
+    buf = f.read(65536)
+    pos = 0
+    frames = 0
+    sample_rate = 0
+    while pos + 7 <= len(buf) and frames < 100:
+        if buf[pos] != 0xFF or buf[pos + 1] & 0xF6 != 0xF0:
+            return None
+        rate_index = (buf[pos + 2] >> 2) & 0xF
+        frame_length = ((buf[pos + 3] & 3) << 11) | (buf[pos + 4] << 3) | (buf[pos + 5] >> 5)
+        if rate_index >= len(ADTS_SAMPLE_RATES) or frame_length < 7:
+            return None
+        sample_rate = ADTS_SAMPLE_RATES[rate_index]
+        frames += (buf[pos + 6] & 3) + 1
+        pos += frame_length
+    
+    if frames < 3:
+        return None
+    # Same estimate mutagen uses: average frame size over the stream size
+    return {}, frames * 1024 * (file_size - start) / (pos * sample_rate), None
+
+FAST_TAG_READERS = {
+    '.mp3': _fast_mp3,
+    '.flac': _fast_flac,
+    '.ogg': _fast_ogg,
+    '.wav': _fast_wav,
+    '.m4a': _fast_mp4,
+    '.aac': _fast_aac,
+}
+
+def read_tags_fast(file_path):
+    """Header-only read for bulk imports: (Track, picture), or None to use mutagen"""
+    reader = FAST_TAG_READERS.get(os.path.splitext(file_path)[1].lower())
+    if reader is None:
+        return None
+    
+    try:
+        with open(file_path, 'rb') as f:
+            result = reader(f, os.fstat(f.fileno()).st_size)
+    except Exception:
+        return None
+    if result is None:
+        return None
+    
+    fields, seconds, picture = result
+    return _make_track(file_path, fields.get('title'), fields.get('artist'),
+                       fields.get('album'), seconds, picture)
+
+def read_metadata_batch(file_paths, fast=False):
+    """Extract (metadata, picture) pairs for a chunk of files in one worker call"""
+    return [read_tags(file_path, fast) for file_path in file_paths]
+
+class MetadataCache:
+    """Persistent metadata cache keyed by file path, mtime and size"""
+    SCHEMA_VERSION = 3
+    
+    def __init__(self, db_path="library_cache.db"):
+        self.db_path = db_path
+        self.conn = None
+        self.lock = threading.Lock()
+        self.pending = []
+        self.batch_size = 500
+        self.open()
+    
+    def open(self):
+        """Open the cache database, recreating it if the schema changed"""
+        import sqlite3
+        try:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.SCHEMA_VERSION:
+                self.conn.execute("DROP TABLE IF EXISTS tracks")
+                self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS tracks ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, "
+                "title TEXT, artist TEXT, album TEXT, seconds INTEGER, art TEXT)"
+            )
+            self.conn.commit()
+        except Exception as e:
+            print(f"Error opening metadata cache: {e}")
+            self.conn = None
+    
+    def get(self, file_path, mtime_ns, size):
+        """Return cached metadata if the file is unchanged, otherwise None"""
+        if self.conn is None:
+            return None
+        
+        try:
+            with self.lock:
+                row = self.conn.execute(
+                    "SELECT mtime_ns, size, title, artist, album, seconds, art "
+                    "FROM tracks WHERE path = ?", (normalize_path(file_path),)
+                ).fetchone()
+        except Exception as e:
+            print(f"Error reading metadata cache: {e}")
+            return None
+        
+        if row is None or row[0] != mtime_ns or row[1] != size:
+            return None
+        
+        return Track(file_path, row[2], row[3], row[4], row[5], row[6])
+    
+    def put(self, metadata, mtime_ns, size):
+        """Queue metadata for a file, writing in batches"""
+        if self.conn is None:
+            return
+        
+        with self.lock:
+            self.pending.append((
+                normalize_path(metadata.path), mtime_ns, size, metadata.title,
+                metadata.artist, metadata.album, metadata.seconds, metadata.art
+            ))
+            if len(self.pending) >= self.batch_size:
+                self._write_pending()
+    
+    def flush(self):
+        """Write all queued entries to disk"""
+        if self.conn is None:
+            return
+        
+        with self.lock:
+            self._write_pending()
+    
+    def _write_pending(self):
+        """Write queued entries in a single transaction (lock must be held)"""
+        if not self.pending:
+            return
+        
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO tracks "
+                    "(path, mtime_ns, size, title, artist, album, seconds, art) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self.pending
+                )
+        except Exception as e:
+            print(f"Error writing metadata cache: {e}")
+        self.pending = []
+    
+    def close(self):
+        """Flush pending entries and close the database"""
+        self.flush()
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
+
+class MetadataExtractor:
+    """Extract metadata for many files concurrently using a worker pool"""
+    def __init__(self, cache, workers=None, use_processes=False, chunk_size=32, on_picture=None,
+                 fast_tags=False):
+        self.cache = cache
+        # Header-only parsing for the common formats, mutagen for everything else
+        self.fast_tags = fast_tags
+        # on_picture(art, data) receives covers found while parsing tags
+        self.on_picture = on_picture
+        self.use_processes = use_processes
+        if workers is None:
+            # Tag reads mostly wait on disk, so threads can outnumber cores
+            cpus = os.cpu_count() or 1
+            workers = cpus if use_processes else min(32, cpus * 4)
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.max_chunks_in_flight = self.workers * 2
+        self.executor = None
+        self.lock = threading.Lock()
+    
+    def _get_executor(self):
+        """Create the worker pool on first use"""
+        with self.lock:
+            if self.executor is None:
+                if self.use_processes:
+                    from concurrent.futures import ProcessPoolExecutor
+                    self.executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                       thread_name_prefix="metadata")
+            return self.executor
+    
+    def _stat_file(self, file_path):
+        """Return stat result for a playable file, or None to skip it"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        
+        if stat.st_size < 1024:
+            return None
+        return stat
+    
+    def lookup(self, file_path):
+        """Return (track, complete) without parsing: cached metadata or a filename-only placeholder.
+        
+        Returns None for files that should be skipped.
+        """
+        stat = self._stat_file(file_path)
+        if stat is None:
+            return None
+        
+        metadata = self.cache.get(file_path, stat.st_mtime_ns, stat.st_size)
+        if metadata is not None:
+            return metadata, True
+        
+        title = os.path.splitext(os.path.basename(file_path))[0]
+        return Track(file_path, title[:100], "Unknown Artist", "Unknown Album"), False
+    
+    def _keep_picture(self, metadata, picture):
+        """Hand a freshly parsed cover to the art store"""
+        if picture and self.on_picture is not None:
+            try:
+                self.on_picture(metadata.art, picture)
+            except Exception as e:
+                print(f"Error keeping album art for {metadata.path}: {e}")
+    
+    def _submit_chunk(self, executor, file_paths):
+        """Resolve cache hits now and send the misses to the pool"""
+        results = []
+        misses = []
+        for file_path in file_paths:
+            stat = self._stat_file(file_path)
+            if stat is None:
+                results.append(None)
+                continue
+            
+            metadata = self.cache.get(file_path, stat.st_mtime_ns, stat.st_size)
+            if metadata is None:
+                misses.append((len(results), stat))
+                results.append(file_path)
+            else:
+                results.append(metadata)
+        
+        future = None
+        if misses:
+            future = executor.submit(read_metadata_batch, [results[i] for i, _ in misses],
+                                     self.fast_tags)
+        return results, misses, future
+    
+    def _collect_chunk(self, results, misses, future):
+        """Merge pool results back into chunk order and cache them"""
+        if future is None:
+            return results
+        
+        try:
+            parsed = future.result()
+        except Exception as e:
+            print(f"Error extracting metadata: {e}")
+            parsed = [read_tags(results[i], self.fast_tags) for i, _ in misses]
+        
+        for (i, stat), (metadata, picture) in zip(misses, parsed):
+            results[i] = metadata
+            self._keep_picture(metadata, picture)
+            self.cache.put(metadata, stat.st_mtime_ns, stat.st_size)
+        return results
+    
+    def extract_many(self, file_paths):
+        """Yield metadata (or None for skipped files) in input order as it becomes ready"""
+        executor = self._get_executor()
+        in_flight = deque()
+        chunk = []
+        # Start with tiny chunks so the first results arrive quickly
+        chunk_limit = 1
+        
+        try:
+            for file_path in file_paths:
+                chunk.append(file_path)
+                if len(chunk) < chunk_limit:
+                    continue
+                
+                in_flight.append(self._submit_chunk(executor, chunk))
+                chunk = []
+                chunk_limit = min(self.chunk_size, chunk_limit * 2)
+                
+                # Stream finished chunks and bound the work queued ahead of the consumer
+                while in_flight and (len(in_flight) >= self.max_chunks_in_flight or
+                                     in_flight[0][2] is None or in_flight[0][2].done()):
+                    yield from self._collect_chunk(*in_flight.popleft())
+            
+            if chunk:
+                in_flight.append(self._submit_chunk(executor, chunk))
+            
+            while in_flight:
+                yield from self._collect_chunk(*in_flight.popleft())
+        finally:
+            # Drop queued work if the consumer stopped early
+            for _, _, future in in_flight:
+                if future is not None:
+                    future.cancel()
+    
+    def shutdown(self):
+        """Stop the worker pool"""
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+
+class SearchIndex:
+    """Trigram index over title, artist and album that mirrors the playlist order"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+    
+    def clear(self):
+        """Drop every indexed song"""
+        with self.lock:
+            self.texts = {}      # doc id -> lowercase searchable fields
+            self.postings = {}   # trigram -> set of doc ids
+            self.doc_ids = []    # live doc ids in playlist order (always ascending)
+            self.unposted = []   # doc ids from extend() whose trigrams are not posted yet
+            self.next_id = 0
+            self.last_query = ""
+            self.last_results = []
+    
+    def __len__(self):
+        return len(self.doc_ids)
+    
+    def _trigrams(self, fields):
+        """Return the trigrams of each field (never spanning two fields)"""
+        return {field[i:i + 3] for field in fields for i in range(len(field) - 2)}
+    
+    def add(self, song):
+        """Index a song appended to the end of the playlist"""
+        fields = (song.title.lower(), song.artist.lower(), song.album.lower())
+        with self.lock:
+            doc_id = self.next_id
+            self.next_id += 1
+            self.texts[doc_id] = fields
+            self.doc_ids.append(doc_id)
+            for gram in self._trigrams(fields):
+                posting = self.postings.get(gram)
+                if posting is None:
+                    self.postings[gram] = {doc_id}
+                else:
+                    posting.add(doc_id)
+            
+            # Keep the cached result set valid for narrowing on the next keystroke
+            if self.last_query and self._matches(doc_id, self.last_query):
+                self.last_results.append(doc_id)
+    
+    def extend(self, songs):
+        """Append many songs at once; their trigrams are posted later by index_pending()"""
+        rows = [(song.title.lower(), song.artist.lower(), song.album.lower()) for song in songs]
+        with self.lock:
+            first_id = self.next_id
+            self.next_id = first_id + len(rows)
+            new_ids = range(first_id, self.next_id)
+            self.texts.update(zip(new_ids, rows))
+            self.doc_ids.extend(new_ids)
+            self.unposted.extend(new_ids)
+            
+            if self.last_query:
+                self.last_results.extend(doc_id for doc_id in new_ids
+                                         if self._matches(doc_id, self.last_query))
+    
+    def index_pending(self, batch_size=1000):
+        """Post the trigrams of bulk-added songs, a batch per lock hold so searches stay responsive"""
+        while True:
+            with self.lock:
+                if not self.unposted:
+                    return
+                batch = self.unposted[:batch_size]
+                del self.unposted[:batch_size]
+                for doc_id in batch:
+                    fields = self.texts.get(doc_id)
+                    if fields is None:
+                        continue   # removed before it was posted
+                    for gram in self._trigrams(fields):
+                        posting = self.postings.get(gram)
+                        if posting is None:
+                            self.postings[gram] = {doc_id}
+                        else:
+                            posting.add(doc_id)
+    
+    def remove_at(self, position):
+        """Remove the song at a playlist position"""
+        with self.lock:
+            doc_id = self.doc_ids.pop(position)
+            self._unpost(doc_id)
+    
+    def remove_positions(self, positions):
+        """Remove the songs at several playlist positions with one pass over the doc ids"""
+        with self.lock:
+            for position in positions:
+                self._unpost(self.doc_ids[position])
+            self.doc_ids = [doc_id for doc_id in self.doc_ids if doc_id in self.texts]
+    
+    def _unpost(self, doc_id):
+        """Drop one document's text and postings (lock held)"""
+        fields = self.texts.pop(doc_id)
+        for gram in self._trigrams(fields):
+            posting = self.postings.get(gram)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self.postings[gram]
+    
+    def update_at(self, position, song):
+        """Re-index the song at a playlist position after its tags changed"""
+        fields = (song.title.lower(), song.artist.lower(), song.album.lower())
+        with self.lock:
+            doc_id = self.doc_ids[position]
+            old_grams = self._trigrams(self.texts[doc_id])
+            new_grams = self._trigrams(fields)
+            self.texts[doc_id] = fields
+            
+            for gram in old_grams - new_grams:
+                posting = self.postings.get(gram)
+                if posting is not None:
+                    posting.discard(doc_id)
+                    if not posting:
+                        del self.postings[gram]
+            for gram in new_grams - old_grams:
+                posting = self.postings.get(gram)
+                if posting is None:
+                    self.postings[gram] = {doc_id}
+                else:
+                    posting.add(doc_id)
+            
+            # Keep the cached result set valid for narrowing on the next keystroke
+            if self.last_query:
+                index = bisect.bisect_left(self.last_results, doc_id)
+                present = index < len(self.last_results) and self.last_results[index] == doc_id
+                matches = self._matches(doc_id, self.last_query)
+                if matches and not present:
+                    self.last_results.insert(index, doc_id)
+                elif present and not matches:
+                    del self.last_results[index]
+    
+    def _matches(self, doc_id, query):
+        """Check a query against one document's fields"""
+        fields = self.texts.get(doc_id)
+        return fields is not None and any(query in field for field in fields)
+    
+    def search(self, query):
+        """Return playlist positions of songs whose title, artist or album contain the query"""
+        query = query.lower()
+        with self.lock:
+            if not query:
+                self.last_query = ""
+                self.last_results = []
+                return list(range(len(self.doc_ids)))
+            
+            candidates = None
+            verified = False
+            if self.last_query and self.last_query in query:
+                # Typing more characters can only narrow the previous result set
+                candidates = self.last_results
+            
+            # Until bulk-added songs are posted, trigram lookups would miss them; scan instead
+            if len(query) >= 3 and not self.unposted:
+                postings = []
+                for gram in self._trigrams((query,)):
+                    posting = self.postings.get(gram)
+                    if not posting:
+                        postings = None
+                        break
+                    postings.append(posting)
+                
+                if postings is None:
+                    candidates = []
+                else:
+                    postings.sort(key=len)
+                    if candidates is None or len(postings[0]) <= len(candidates):
+                        candidates = set.intersection(*postings)
+                        # A three letter query is a single trigram, so every hit is exact
+                        verified = len(query) == 3
+            
+            if candidates is None:
+                candidates = self.doc_ids
+            
+            if verified:
+                results = sorted(candidates)
+            else:
+                results = sorted(doc_id for doc_id in candidates if self._matches(doc_id, query))
+            self.last_query = query
+            self.last_results = results
+            
+            doc_ids = self.doc_ids
+            if len(results) * 16 > len(doc_ids):
+                # Large result sets are cheaper to map with one pass than many bisects
+                hits = set(results)
+                return [i for i, doc_id in enumerate(doc_ids) if doc_id in hits]
+            return [bisect.bisect_left(doc_ids, doc_id) for doc_id in results]
+
+class LibraryModel:
+    """Ordered track list with hash indexes by path, album and view item"""
+    def __init__(self, search_index=None):
+        self.lock = threading.RLock()
+        self.search_index = search_index
+        self.songs = []
+        self.by_folder = {}     # folder -> {filename: track}, sharing each folder string
+        self.positions = {}     # track -> position (trusted below positions_valid)
+        self.positions_valid = 0
+        self.albums = {}        # (album, artist) -> {track: None} in playlist order
+        self.item_tracks = {}   # playlist view item id -> track
+        self.version = 0        # bumped on every change, so snapshots are only written when needed
+    
+    def __len__(self):
+        return len(self.songs)
+    
+    def __bool__(self):
+        return bool(self.songs)
+    
+    def __getitem__(self, position):
+        return self.songs[position]
+    
+    def __iter__(self):
+        return iter(self.songs)
+    
+    def add(self, song):
+        """Append a track and return its position, or None if the path is already present"""
+        with self.lock:
+            folder = self.by_folder.setdefault(song.folder, {})
+            if song.filename in folder:
+                return None
+            
+            # Index first so a search never sees a playlist entry it cannot find
+            if self.search_index is not None:
+                self.search_index.add(song)
+            
+            position = len(self.songs)
+            self.songs.append(song)
+            folder[song.filename] = song
+            self.positions[song] = position
+            if self.positions_valid == position:
+                self.positions_valid += 1
+            self.albums.setdefault((song.album, song.artist), {})[song] = None
+            self.version += 1
+            return position
+    
+    def extend(self, songs):
+        """Append many tracks at once, skipping paths already present; return how many were added"""
+        with self.lock:
+            added = []
+            for song in songs:
+                folder = self.by_folder.setdefault(song.folder, {})
+                if song.filename in folder:
+                    continue
+                folder[song.filename] = song
+                self.albums.setdefault((song.album, song.artist), {})[song] = None
+                added.append(song)
+            
+            # Index first so a search never sees a playlist entry it cannot find
+            if self.search_index is not None:
+                self.search_index.extend(added)
+            
+            start = len(self.songs)
+            self.songs.extend(added)
+            self.positions.update(zip(added, range(start, len(self.songs))))
+            if self.positions_valid == start:
+                self.positions_valid = len(self.songs)
+            self.version += 1
+            return len(added)
+    
+    def remove_at(self, position):
+        """Remove and return the track at a position.
+        
+        O(n): the list shifts, and positions after it are rebuilt on the next
+        lookup. Use remove_positions() to remove many tracks in one pass.
+        """
+        with self.lock:
+            song = self.songs.pop(position)
+            self._unindex(song)
+            # Positions after this one shifted; they are rebuilt lazily on the next lookup
+            self.positions_valid = min(self.positions_valid, position)
+            
+            if self.search_index is not None:
+                self.search_index.remove_at(position)
+            self.version += 1
+            return song
+    
+    def remove_positions(self, positions):
+        """Remove the tracks at several positions in one O(n) pass; return them in position order"""
+        with self.lock:
+            positions = sorted(set(positions))
+            if not positions:
+                return []
+            removed = [self.songs[position] for position in positions]
+            for song in removed:
+                self._unindex(song)
+            gone = set(removed)
+            self.songs = [song for song in self.songs if song not in gone]
+            self.positions_valid = min(self.positions_valid, positions[0])
+            
+            if self.search_index is not None:
+                self.search_index.remove_positions(positions)
+            self.version += 1
+            return removed
+    
+    def _unindex(self, song):
+        """Drop a track from the path, position and album indexes (lock held)"""
+        folder = self.by_folder.get(song.folder)
+        if folder is not None:
+            folder.pop(song.filename, None)
+            if not folder:
+                del self.by_folder[song.folder]
+        del self.positions[song]
+        
+        album_key = (song.album, song.artist)
+        album = self.albums.get(album_key)
+        if album is not None:
+            album.pop(song, None)
+            if not album:
+                del self.albums[album_key]
+    
+    def update_tags(self, song, metadata):
+        """Copy parsed tags onto a placeholder track in place; return its position, or None if removed"""
+        with self.lock:
+            position = self.position_of(song)
+            if position is None:
+                return None
+            
+            album_key = (song.album, song.artist)
+            album = self.albums.get(album_key)
+            if album is not None:
+                album.pop(song, None)
+                if not album:
+                    del self.albums[album_key]
+            
+            song.title = metadata.title
+            song.artist = metadata.artist
+            song.album = metadata.album
+            song.seconds = metadata.seconds
+            song.art = metadata.art
+            
+            album_key = (song.album, song.artist)
+            album = self.albums.setdefault(album_key, {})
+            last = next(reversed(album), None)
+            album[song] = None
+            if last is not None and self.position_of(last) > position:
+                # Visible rows are filled out of order; keep albums in playlist order
+                self.albums[album_key] = dict.fromkeys(sorted(album, key=self.position_of))
+            
+            if self.search_index is not None:
+                self.search_index.update_at(position, song)
+            self.version += 1
+            return position
+    
+    def clear(self):
+        """Remove every track"""
+        with self.lock:
+            self.songs = []
+            self.by_folder = {}
+            self.positions = {}
+            self.positions_valid = 0
+            self.albums = {}
+            self.item_tracks = {}
+            self.version += 1
+            if self.search_index is not None:
+                self.search_index.clear()
+    
+    def get(self, path):
+        """Return the track for a path, or None"""
+        folder, filename = os.path.split(normalize_path(path))
+        return self.by_folder.get(folder, {}).get(filename)
+    
+    def position_of(self, song):
+        """Return the playlist position of a track, or None"""
+        with self.lock:
+            position = self.positions.get(song)
+            if position is None or position < self.positions_valid:
+                return position
+            
+            for i in range(self.positions_valid, len(self.songs)):
+                self.positions[self.songs[i]] = i
+            self.positions_valid = len(self.songs)
+            return self.positions[song]
+    
+    def position_of_path(self, path):
+        """Return the playlist position of a path, or None"""
+        song = self.get(path)
+        return None if song is None else self.position_of(song)
+    
+    def album_keys(self):
+        """Return the (album, artist) keys in first-seen order"""
+        with self.lock:
+            return list(self.albums)
+    
+    def album_songs(self, album, artist):
+        """Return the tracks of one album in playlist order"""
+        with self.lock:
+            return list(self.albums.get((album, artist), ()))
+    
+    def set_item(self, item_id, song):
+        """Remember which track a view item shows"""
+        self.item_tracks[item_id] = song
+    
+    def track_for_item(self, item_id):
+        """Return the track shown by a view item, or None"""
+        return self.item_tracks.get(item_id)
+    
+    def clear_items(self):
+        """Forget all view item mappings"""
+        self.item_tracks = {}
+
+class LibrarySnapshot:
+    """Columnar library file: shared-string tables plus one packed array per track field, zlib-compressed"""
+    MAGIC = b'SMPLIB\x00\x02'
+    
+    def __init__(self, path="library_snapshot.bin"):
+        self.path = path
+    
+    def _pack_strings(self, strings):
+        """Pack a list of strings as their concatenated UTF-8 plus a column of lengths"""
+        # Lengths rather than separators, since tags may contain any character
+        blob = ''.join(strings).encode('utf-8', 'surrogatepass')
+        lengths = self._pack_array('I', map(len, strings))
+        return struct.pack('<II', len(strings), len(blob)) + blob + lengths
+    
+    @staticmethod
+    def _pack_array(typecode, values):
+        """Pack an integer column as little-endian array bytes"""
+        column = array.array(typecode, values)
+        if sys.byteorder == 'big':
+            column.byteswap()
+        blob = column.tobytes()
+        return struct.pack('<II', len(column), len(blob)) + blob
+    
+    @staticmethod
+    def _read_section(data, pos):
+        """Return (count, blob, next position) for one packed section"""
+        count, length = struct.unpack_from('<II', data, pos)
+        pos += 8
+        if pos + length > len(data):
+            raise ValueError("truncated section")
+        return count, data[pos:pos + length], pos + length
+    
+    def _unpack_strings(self, data, pos):
+        count, blob, pos = self._read_section(data, pos)
+        lengths, pos = self._unpack_array('I', data, pos)
+        text = blob.decode('utf-8', 'surrogatepass')
+        ends = list(itertools.accumulate(lengths))
+        if len(ends) != count or (ends[-1] if ends else 0) != len(text):
+            raise ValueError("string table size mismatch")
+        strings = [text[start:end] for start, end in zip([0] + ends, ends)]
+        return strings, pos
+    
+    def _unpack_array(self, typecode, data, pos):
+        count, blob, pos = self._read_section(data, pos)
+        column = array.array(typecode)
+        column.frombytes(blob)
+        if sys.byteorder == 'big':
+            column.byteswap()
+        if len(column) != count:
+            raise ValueError("column size mismatch")
+        return column, pos
+    
+    def save(self, roots, tracks, signature):
+        """Write the library atomically; signature(track) gives (mtime_ns, size) or None if unknown"""
+        # Shared strings are stored once and referenced by index; art index 0 means tags not read yet
+        tables = ({}, {}, {}, {None: 0})
+        folders, artists, albums, arts = tables
+        columns = ([], [], [], [])
+        mtimes = []
+        sizes = []
+        for track in tracks:
+            for table, column, value in zip(tables, columns,
+                                            (track.folder, track.artist, track.album, track.art)):
+                index = table.get(value)
+                if index is None:
+                    index = table[value] = len(table)
+                column.append(index)
+            stat = signature(track)
+            mtimes.append(stat[0] if stat else 0)
+            sizes.append(stat[1] if stat else -1)
+        
+        parts = [self._pack_strings(roots)]
+        parts.extend(self._pack_strings(list(table)) for table in (folders, artists, albums))
+        parts.append(self._pack_strings(list(arts)[1:]))
+        parts.append(self._pack_strings([track.filename for track in tracks]))
+        parts.append(self._pack_strings([track.title for track in tracks]))
+        parts.extend(self._pack_array('I', column) for column in columns)
+        parts.append(self._pack_array('I', [track.seconds for track in tracks]))
+        parts.append(self._pack_array('q', mtimes))
+        parts.append(self._pack_array('q', sizes))
+        
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(self.MAGIC)
+                f.write(zlib.compress(b''.join(parts), 1))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"Error saving library snapshot: {e}")
+    
+    def load(self):
+        """Return (roots, tracks, {folder: {filename: (mtime_ns, size)}}, incomplete tracks), or None without a usable file"""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"Error reading library snapshot: {e}")
+            return None
+        
+        if not data.startswith(self.MAGIC):
+            print("Library snapshot is from another version, ignoring it")
+            return None
+        try:
+            data = zlib.decompress(data[len(self.MAGIC):])
+            roots, pos = self._unpack_strings(data, 0)
+            tables = []
+            for _ in range(4):
+                table, pos = self._unpack_strings(data, pos)
+                tables.append([sys.intern(value) for value in table])
+            folders, artists, albums, arts = tables
+            arts.insert(0, None)
+            filenames, pos = self._unpack_strings(data, pos)
+            titles, pos = self._unpack_strings(data, pos)
+            columns = []
+            for typecode in ('I', 'I', 'I', 'I', 'I', 'q', 'q'):
+                column, pos = self._unpack_array(typecode, data, pos)
+                columns.append(column)
+            folder_ids, artist_ids, album_ids, art_ids, seconds, mtimes, sizes = columns
+            if not all(len(column) == len(filenames) for column in columns) or len(titles) != len(filenames):
+                raise ValueError("column lengths differ")
+            
+            make = Track.from_parts
+            tracks = [make(folders[f], name, title, artists[a], albums[b], secs, arts[c])
+                      for f, name, title, a, b, secs, c
+                      in zip(folder_ids, filenames, titles, artist_ids, album_ids, seconds, art_ids)]
+        except Exception as e:
+            print(f"Library snapshot is unreadable, ignoring it: {e}")
+            return None
+        
+        # Same layout as the watcher's own snapshot; None marks a file whose signature was unknown
+        known = {}
+        for track, mtime, size in zip(tracks, mtimes, sizes):
+            known.setdefault(track.folder, {})[track.filename] = (mtime, size) if size >= 0 else None
+        incomplete = [track for track in tracks if track.art is None]
+        return roots, tracks, known, incomplete
+
+class TagFillQueue:
+    """Placeholder tracks waiting for their tags, with on-screen rows served first"""
+    def __init__(self):
+        self.pending = OrderedDict()   # track -> None, in import order
+        self.priority = deque()        # tracks the view wants next
+        self.closed = False
+        self.condition = threading.Condition()
+    
+    def __len__(self):
+        return len(self.pending)
+    
+    def add(self, track):
+        """Queue a placeholder for the background tag fill; False once the queue is closed"""
+        with self.condition:
+            if self.closed:
+                return False
+            self.pending[track] = None
+            self.condition.notify()
+            return True
+    
+    def prioritize(self, tracks):
+        """Serve these tracks next (replaces the previous priority list)"""
+        with self.condition:
+            self.priority = deque(track for track in tracks if track in self.pending)
+    
+    def close(self):
+        """Mark that no more placeholders will be added"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+    
+    def cancel(self):
+        """Drop everything still queued and let the consumer finish"""
+        with self.condition:
+            self.pending.clear()
+            self.priority.clear()
+            self.closed = True
+            self.condition.notify_all()
+    
+    def __iter__(self):
+        """Yield queued tracks until the queue is closed and drained"""
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                
+                track = None
+                while self.priority and track is None:
+                    candidate = self.priority.popleft()
+                    if candidate in self.pending:
+                        del self.pending[candidate]
+                        track = candidate
+                if track is None:
+                    track, _ = self.pending.popitem(last=False)
+            yield track
+
+class LibraryWatcher:
+    """Watch library folders and report audio file changes as diffs (inotify on Linux, polling elsewhere)"""
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+                  IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+    
+    def __init__(self, on_changes, poll_interval=10.0, settle_delay=0.5):
+        # on_changes(changed_paths, removed_paths) is called from the watcher thread and must not
+        # wait on the UI thread, which joins this thread when the roots change
+        self.on_changes = on_changes
+        self.poll_interval = poll_interval
+        self.settle_delay = settle_delay
+        self.roots = []
+        self.known = None      # folder -> {filename: (mtime_ns, size)} from the last session, diffed after the first walk
+        self.on_found = None   # on_found(paths) gets each folder's files during the first walk, then None
+        self.found_slice = 64  # paths per on_found call while a folder is being listed
+        self.snapshot = {}     # directory -> {filename: (mtime_ns, size)} for audio files
+        self.subdirs = {}      # directory -> set of child directories
+        self.unreadable = set()  # directories the first walk couldn't list
+        self.thread = None
+        self.stopped = threading.Event()
+        self.libc = None
+        self.inotify_fd = None
+        self.watch_dirs = {}   # watch descriptor -> directory
+        self.dir_watches = {}  # directory -> watch descriptor
+    
+    def set_roots(self, roots, known=None, on_found=None):
+        """Watch these folders instead of the current ones, optionally reporting changes since known"""
+        self.stop()
+        self.roots = list(roots)
+        self.known = known
+        self.on_found = on_found
+        if self.roots:
+            self.stopped = threading.Event()
+            self.thread = threading.Thread(target=self._run, name="library-watcher", daemon=True)
+            self.thread.start()
+    
+    def stop(self):
+        """Stop watching"""
+        self.stopped.set()
+        if self.thread is not None:
+            # Folder walks check the stop flag per folder, so this returns promptly
+            self.thread.join()
+            self.thread = None
+    
+    def _run(self):
+        """Watcher thread: snapshot the roots, then wait for changes"""
+        try:
+            self.snapshot = {}
+            self.subdirs = {}
+            self.unreadable = set()
+            self._start_inotify()
+            # The first walk doubles as the import's discovery stage, so folders are listed once
+            on_found, self.on_found = self.on_found, None
+            try:
+                for root in self.roots:
+                    self._add_tree(root, on_found=on_found)
+            finally:
+                if on_found is not None:
+                    on_found(None)
+            
+            known, self.known = self.known, None
+            if known is not None and not self.stopped.is_set():
+                self._report(*self._reconcile(known))
+            
+            if self.inotify_fd is not None:
+                self._inotify_loop()
+            if not self.stopped.is_set():
+                self._poll_loop()
+        except Exception as e:
+            print(f"Error watching library folders: {e}")
+        finally:
+            self._close_inotify()
+    
+    def _start_inotify(self):
+        """Open an inotify instance through libc (Linux only)"""
+        if not sys.platform.startswith('linux'):
+            return
+        
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable, polling library folders: {e}")
+            return
+        
+        if fd < 0:
+            print(f"inotify unavailable, polling library folders: {os.strerror(ctypes.get_errno())}")
+            return
+        self.libc = libc
+        self.inotify_fd = fd
+    
+    def _close_inotify(self):
+        """Close the inotify instance; the watcher keeps going by polling"""
+        if self.inotify_fd is not None:
+            try:
+                os.close(self.inotify_fd)
+            except OSError:
+                pass
+        self.inotify_fd = None
+        self.watch_dirs = {}
+        self.dir_watches = {}
+    
+    def _add_watch(self, directory):
+        """Watch one directory, giving up on inotify if the kernel refuses (e.g. watch limit)"""
+        if self.inotify_fd is None:
+            return
+        
+        wd = self.libc.inotify_add_watch(self.inotify_fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            print(f"Cannot watch {directory} ({os.strerror(ctypes.get_errno())}), polling instead")
+            self._close_inotify()
+            return
+        self.watch_dirs[wd] = directory
+        self.dir_watches[directory] = wd
+    
+    def _scan_directory(self, directory, on_found=None):
+        """Return ({audio filename: (mtime_ns, size)}, subdirectories) in listing order, or None if the folder is gone
+        
+        Other OSErrors are raised, and a file that can't be stat'd maps to None rather than being left out.
+        on_found(paths) gets the audio files in small slices while the folder is still being listed."""
+        files = {}
+        subdirs = []
+        found = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                            continue
+                        if os.path.splitext(entry.name)[1].lower() not in AUDIO_EXTENSIONS:
+                            continue
+                        files[entry.name] = None
+                        stat = entry.stat()
+                        files[entry.name] = (stat.st_mtime_ns, stat.st_size)
+                    except FileNotFoundError:
+                        files.pop(entry.name, None)   # deleted while listing
+                        continue
+                    except OSError:
+                        if entry.name not in files:
+                            continue
+                    if on_found is not None:
+                        found.append(entry.path)
+                        # A huge flat folder shouldn't hold back the first track
+                        if len(found) >= self.found_slice:
+                            on_found(found)
+                            found = []
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        finally:
+            if found:
+                on_found(found)
+        return files, subdirs
+    
+    def _add_tree(self, directory, changed=None, on_found=None):
+        """Start tracking a folder and everything below it, collecting its files as changed"""
+        pending = [directory]
+        while pending and not self.stopped.is_set():
+            directory = pending.pop()
+            if directory in self.snapshot:
+                continue
+            # Watch before listing so nothing created in between is missed
+            self._add_watch(directory)
+            try:
+                result = self._scan_directory(directory, on_found)
+            except OSError:
+                self.unreadable.add(directory)
+                continue
+            if result is None:
+                continue
+            
+            files, subdirs = result
+            self.snapshot[directory] = files
+            self.subdirs[directory] = set(subdirs)
+            if changed is not None:
+                changed.extend(os.path.join(directory, name) for name in files)
+            # Visit subfolders top-down in listing order, like iter_audio_files
+            pending.extend(reversed(subdirs))
+    
+    def _drop_tree(self, directory, removed):
+        """Stop tracking a folder that disappeared, collecting its files as removed"""
+        pending = [directory]
+        while pending:
+            directory = pending.pop()
+            files = self.snapshot.pop(directory, None)
+            if files is None:
+                continue
+            removed.extend(os.path.join(directory, name) for name in files)
+            pending.extend(self.subdirs.pop(directory, ()))
+            
+            wd = self.dir_watches.pop(directory, None)
+            if wd is not None:
+                self.watch_dirs.pop(wd, None)
+                self.libc.inotify_rm_watch(self.inotify_fd, wd)
+    
+    def _rescan(self, directories):
+        """Re-list some folders and return the (changed, removed) audio paths"""
+        changed = []
+        removed = []
+        for directory in directories:
+            if self.stopped.is_set():
+                break
+            old_files = self.snapshot.get(directory)
+            if old_files is None:
+                continue   # dropped along with a parent
+            try:
+                result = self._scan_directory(directory)
+            except OSError:
+                continue   # unreadable for now; keep what we knew
+            if result is None:
+                # Gone only if its parent still lists without it, not when the drive went away
+                if is_deleted(directory):
+                    self._drop_tree(directory, removed)
+                continue
+            
+            files, subdirs = result
+            subdirs = set(subdirs)
+            for name, signature in files.items():
+                if signature is None and name in old_files:
+                    files[name] = old_files[name]
+                elif old_files.get(name) != signature:
+                    changed.append(os.path.join(directory, name))
+            for name in old_files.keys() - files.keys():
+                removed.append(os.path.join(directory, name))
+            self.snapshot[directory] = files
+            
+            old_subdirs = self.subdirs.get(directory, set())
+            self.subdirs[directory] = subdirs
+            for subdir in subdirs - old_subdirs:
+                self._add_tree(subdir, changed)
+            for subdir in old_subdirs - subdirs:
+                self._drop_tree(subdir, removed)
+        return changed, removed
+    
+    def _reconcile(self, known):
+        """Diff the first walk against the files known from the last session"""
+        changed = []
+        removed = []
+        # A missing root is more likely an unplugged drive than a deleted library
+        if any(root not in self.snapshot for root in self.roots):
+            return changed, removed
+        
+        for directory, files in self.snapshot.items():
+            old_files = known.get(directory, {})
+            for name, signature in files.items():
+                if signature is None and name in old_files:
+                    files[name] = old_files[name]   # can't stat it now; keep what we knew
+                elif old_files.get(name) != signature:
+                    changed.append(os.path.join(directory, name))
+            removed.extend(os.path.join(directory, name) for name in old_files if name not in files)
+        # Folders that couldn't be listed hide their contents, they don't delete them
+        unreadable = tuple(os.path.join(directory, '') for directory in self.unreadable)
+        for directory, old_files in known.items():
+            if directory not in self.snapshot and not os.path.join(directory, '').startswith(unreadable):
+                removed.extend(os.path.join(directory, name) for name in old_files)
+        return changed, removed
+    
+    def _report(self, changed, removed):
+        """Hand a non-empty diff to the callback unless watching has stopped"""
+        if (changed or removed) and not self.stopped.is_set():
+            try:
+                self.on_changes(changed, removed)
+            except Exception as e:
+                print(f"Error applying library changes: {e}")
+    
+    def _inotify_loop(self):
+        """Collect inotify events per folder and rescan those folders once they settle"""
+        dirty = set()
+        deadline = None
+        while not self.stopped.is_set() and self.inotify_fd is not None:
+            timeout = 0.5 if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self.inotify_fd], [], [], timeout)
+            if ready:
+                try:
+                    data = os.read(self.inotify_fd, 64 * 1024)
+                except BlockingIOError:
+                    data = b''
+                self._collect_events(data, dirty)
+                if dirty and deadline is None:
+                    deadline = time.monotonic() + self.settle_delay
+            
+            if deadline is not None and time.monotonic() >= deadline:
+                self._report(*self._rescan(dirty))
+                dirty = set()
+                deadline = None
+    
+    def _collect_events(self, data, dirty):
+        """Add the folders touched by a buffer of inotify events to dirty"""
+        pos = 0
+        while pos + 16 <= len(data):
+            wd, mask, _, length = struct.unpack_from('iIII', data, pos)
+            name = data[pos + 16:pos + 16 + length].split(b'\x00', 1)[0]
+            pos += 16 + length
+            
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were lost; fall back to checking every folder once
+                dirty.update(self.snapshot)
+                continue
+            directory = self.watch_dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & self.IN_IGNORED:
+                self.watch_dirs.pop(wd, None)
+                if self.dir_watches.get(directory) == wd:
+                    del self.dir_watches[directory]
+            elif mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                dirty.add(directory)
+            elif mask & self.IN_ISDIR or os.path.splitext(os.fsdecode(name))[1].lower() in AUDIO_EXTENSIONS:
+                dirty.add(directory)
     
-    def create_playlist(self, name):
-        """Create a new playlist"""
-        if name not in self.playlists:
-            self.playlists[name] = []
-            self.save_playlists()
-            return True
-        return False
+    def _poll_loop(self):
+        """Rescan every known folder at a fixed interval"""
+        while not self.stopped.wait(self.poll_interval):
+            self._report(*self._rescan(list(self.snapshot)))
+
+class SearchScheduler:
+    """Debounce search input and run queries off the Tk thread, delivering only the latest"""
+    def __init__(self, widget, search, on_results, delay_ms=150):
+        self.widget = widget
+        self.search = search
+        self.on_results = on_results
+        self.delay_ms = delay_ms
+        self.generation = 0
+        self.after_id = None
+        self.future = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
     
-    def delete_playlist(self, name):
-        """Delete a playlist"""
-        if name in self.playlists and name != "Main Playlist":
-            del self.playlists[name]
-            self.save_playlists()
-            return True
-        return False
+    def schedule(self, query, delay_ms=None):
+        """Run a query after the debounce delay, superseding any earlier one"""
+        self.cancel()
+        delay = self.delay_ms if delay_ms is None else delay_ms
+        self.after_id = self.widget.after(delay, self._start, query, self.generation)
     
-    def add_to_playlist(self, playlist_name, song_path):
-        """Add a song to a playlist"""
-        if playlist_name in self.playlists:
-            if song_path not in self.playlists[playlist_name]:
-                self.playlists[playlist_name].append(song_path)
-                self.save_playlists()
-                return True
-        return False
+    def cancel(self):
+        """Drop any pending or running query"""
+        self.generation += 1
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+        if self.future is not None:
+            self.future.cancel()
+            self.future = None
     
-    def remove_from_playlist(self, playlist_name, song_path):
-        """Remove a song from a playlist"""
-        if playlist_name in self.playlists and song_path in self.playlists[playlist_name]:
-            self.playlists[playlist_name].remove(song_path)
-            self.save_playlists()
-            return True
-        return False
+    def _start(self, query, generation):
+        """Hand the query to the search worker"""
+        self.after_id = None
+        if generation == self.generation:
+            self.future = self.executor.submit(self._run, query, generation)
     
-    def save_playlists(self):
-        """Save playlists to file"""
+    def _run(self, query, generation):
+        """Worker thread: run the query unless it was superseded while queued"""
+        if generation != self.generation:
+            return
+        
         try:
-            with open("playlists.json", "w", encoding='utf-8') as f:
-                json.dump(self.playlists, f, ensure_ascii=False)
+            results = self.search(query)
         except Exception as e:
-            print(f"Error saving playlists: {e}")
+            print(f"Error searching library: {e}")
+            return
+        
+        if generation == self.generation:
+            self.widget.after(0, self._deliver, query, results, generation)
     
-    def load_playlists(self):
-        """Load playlists from file"""
-        try:
-            if os.path.exists("playlists.json"):
-                with open("playlists.json", "r", encoding='utf-8') as f:
-                    self.playlists = json.load(f)
-        except:
-            # Create default main playlist
-            self.playlists = {"Main Playlist": []}
+    def _deliver(self, query, results, generation):
+        """Main thread: apply results if no newer query started meanwhile"""
+        if generation == self.generation:
+            self.future = None
+            self.on_results(query, results)
+    
+    def shutdown(self):
+        """Stop the search worker"""
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class ImageCache:
+    """LRU cache of display images, budgeted in bytes of decoded pixels"""
+    def __init__(self, max_bytes=48 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()   # key -> (image, cost in bytes)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        """Return a cached image and mark it recently used, or None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key, image, cost):
+        """Cache an image, evicting the least recently used ones over budget"""
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self.entries[key] = (image, cost)
+            self.total_bytes += cost
+            
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, (_, evicted_cost) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_cost
+                self.evictions += 1
+    
+    def stats(self):
+        """Return hit/miss/eviction counters and current usage"""
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
 
 class ImageManager:
     """Manage images and album art efficiently"""
-    def __init__(self):
-        self.image_cache = {}
-        self.album_art_cache = {}
-        self.default_album_art = self._create_famous_music_logo()
-        
+    # quality -> (decode headroom over the target size, resampling filter)
+    ART_QUALITY = {
+        'fast': (1, 'BILINEAR'),
+        'balanced': (2, 'LANCZOS'),
+        'best': (None, 'LANCZOS'),   # full decode, original behaviour
+    }
+    
+    def __init__(self, cache_bytes=48 * 1024 * 1024, art_quality='balanced'):
+        # One bounded cache shared by plain images and album art
+        self.cache = ImageCache(cache_bytes)
+        self.art_quality = art_quality
+        self._default_album_art = None   # drawn on first use, not at startup
+        
+        # Lookups that found no art, and image files per folder (scanned once per change)
+        self.art_lock = threading.Lock()
+        self.no_art = OrderedDict()   # path -> (file mtime_ns, folder mtime_ns) when the lookup was made
+        self.max_no_art = 20000
+        self.folder_images = {}   # folder -> (mtime_ns, {lowercase name: path})
+        
+        # Cover bytes captured while reading tags, keyed by content hash
+        self.pictures = ImageCache(16 * 1024 * 1024)
+    
+    @property
+    def default_album_art(self):
+        """Placeholder art, drawn the first time a card or label needs it"""
+        if self._default_album_art is None:
+            self._default_album_art = self._create_famous_music_logo()
+        return self._default_album_art
+    
     def _create_famous_music_logo(self):
         """Create a famous music logo (Spotify-style) for default album art"""
+        from PIL import ImageDraw
         size = (200, 200)
         img = Image.new('RGB', size, color=(30, 215, 96))  # Spotify green background
         draw = ImageDraw.Draw(img)
@@ -264,66 +2665,168 @@ class ImageManager:
         
     def load_image(self, path, size=(40, 40)):
         """Load and cache image with proper error handling"""
-        cache_key = f"{path}_{size[0]}x{size[1]}"
-        if cache_key in self.image_cache:
-            return self.image_cache[cache_key]
+        cache_key = f"image:{path}_{size[0]}x{size[1]}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        img = self.open_image(path, size)
+        if img is not None:
+            return self._store(cache_key, img, size)
         
+        return None
+    
+    def open_image(self, path, size, background_color=(15, 21, 16)):
+        """Open an image file as a resized RGB PIL image (safe on worker threads)"""
         try:
             if os.path.exists(path):
-                img = Image.open(path)
-                # Convert to RGB and ensure no transparency issues
-                if img.mode in ('RGBA', 'LA', 'P'):
-                    background = Image.new('RGB', img.size, (15, 21, 16))  # Dark theme background
-                    if img.mode == 'RGBA':
-                        background.paste(img, mask=img.split()[-1])
-                    else:
-                        background.paste(img)
-                    img = background
-                else:
-                    img = img.convert('RGB')
-                
-                img = img.resize(size, Image.Resampling.LANCZOS)
-                ctk_image = ctk.CTkImage(light_image=img, dark_image=img, size=size)
-                self.image_cache[cache_key] = ctk_image
-                return ctk_image
+                return self._prepare_image(Image.open(path), size, background_color)
         except Exception as e:
             print(f"Error loading image {path}: {e}")
         
         return None
     
-    def extract_album_art(self, file_path, size=(150, 150)):
-        """Extract album art from audio file with multiple methods"""
-        cache_key = f"{file_path}_{size[0]}x{size[1]}"
-        if cache_key in self.album_art_cache:
-            return self.album_art_cache[cache_key]
+    def _decode_scaled(self, img, size):
+        """Decode close to the target size: JPEG draft mode or an integer reduce"""
+        headroom = self.ART_QUALITY[self.art_quality][0]
+        if headroom is None:
+            return img
         
+        target = (size[0] * headroom, size[1] * headroom)
         try:
-            audio = File(file_path)
-            if not audio:
-                return self.default_album_art
-            
-            # Method 1: Check for embedded pictures
-            if hasattr(audio, 'pictures') and audio.pictures:
-                for picture in audio.pictures:
-                    try:
-                        img = Image.open(io.BytesIO(picture.data))
-                        return self._process_album_art(img, size, cache_key)
-                    except:
-                        continue
-            
-            # Method 2: Check for APIC tag (ID3v2)
-            if hasattr(audio, 'tags'):
-                for tag in audio.tags.keys():
-                    if 'APIC' in tag or 'covr' in tag or 'picture' in tag.lower():
-                        try:
-                            picture_data = audio.tags[tag].data
-                            img = Image.open(io.BytesIO(picture_data))
-                            return self._process_album_art(img, size, cache_key)
-                        except:
-                            continue
+            if img.format == 'JPEG':
+                # The JPEG decoder scales by 1/2, 1/4 or 1/8 while decoding
+                img.draft(img.mode, target)
+            else:
+                factor = min(img.width // target[0], img.height // target[1])
+                if factor >= 2:
+                    img = img.reduce(factor)
+        except Exception:
+            pass  # Fall back to a full decode
+        return img
+    
+    def _prepare_image(self, img, size, background_color):
+        """Flatten transparency onto a background and resize"""
+        img = self._decode_scaled(img, size)
+        
+        # Convert to RGB and ensure no transparency issues
+        if img.mode in ('RGBA', 'LA', 'P'):
+            background = Image.new('RGB', img.size, background_color)
+            if img.mode == 'RGBA':
+                background.paste(img, mask=img.split()[-1])
+            else:
+                background.paste(img)
+            img = background
+        else:
+            img = img.convert('RGB')
+        
+        resample = getattr(Image.Resampling, self.ART_QUALITY[self.art_quality][1])
+        return img.resize(size, resample)
+    
+    def forget_art(self, file_path):
+        """Drop a remembered "no art" result, e.g. after the file changed"""
+        with self.art_lock:
+            self.no_art.pop(file_path, None)
+    
+    def _art_signature(self, file_path):
+        """(file mtime_ns, folder mtime_ns) for validating a "no art" result, or None"""
+        try:
+            return (os.stat(file_path).st_mtime_ns,
+                    os.stat(os.path.dirname(file_path) or '.').st_mtime_ns)
+        except OSError:
+            return None
+    
+    def remember_picture(self, art, data):
+        """Keep embedded cover bytes read during tag parsing (safe on worker threads)"""
+        if self.pictures.get(art) is None:
+            self.pictures.put(art, data, len(data))
+    
+    def load_album_art_image(self, file_path, size=(150, 150), art=None):
+        """Find album art for a file as a resized PIL image, or None (safe on worker threads)"""
+        # A "no art" result holds until the file is rewritten or an image lands in its folder
+        signature = self._art_signature(file_path)
+        with self.art_lock:
+            if signature is not None and self.no_art.get(file_path) == signature:
+                self.no_art.move_to_end(file_path)
+                return None
+        
+        img = None
+        data = self.pictures.get(art) if art else None
+        if data is not None:
+            img = self._decode_picture(data, size)
+        if img is None:
+            # art == '' means tag parsing already found no embedded cover
+            img, confirmed = self._find_album_art_image(file_path, size, embedded=art != '')
+            # Only remember a definite answer, not a locked file or an unreadable folder
+            if img is None and confirmed and signature is not None:
+                with self.art_lock:
+                    self.no_art[file_path] = signature
+                    self.no_art.move_to_end(file_path)
+                    while len(self.no_art) > self.max_no_art:
+                        self.no_art.popitem(last=False)
+        return img
+    
+    def _folder_images(self, directory):
+        """Return {lowercase name: path} for image files in a folder, rescanning only when it changes.
+        
+        Returns None if the folder could not be read.
+        """
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+        
+        with self.art_lock:
+            cached = self.folder_images.get(directory)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        images = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    name = entry.name.lower()
+                    if name.endswith(('.jpg', '.jpeg', '.png')):
+                        images[name] = entry.path
+        except OSError as e:
+            print(f"Error scanning {directory} for album art: {e}")
+            return None
+        
+        with self.art_lock:
+            self.folder_images[directory] = (mtime, images)
+        return images
+    
+    def _decode_picture(self, data, size):
+        """Decode embedded cover bytes into a resized PIL image, or None"""
+        try:
+            return self._prepare_image(Image.open(io.BytesIO(data)), size, (35, 33, 35))
+        except Exception:
+            return None
+    
+    def _find_album_art_image(self, file_path, size, embedded=True):
+        """Try embedded pictures, then image files next to the track.
+        
+        Returns (image or None, confirmed), where confirmed is False if an error
+        may have hidden the art.
+        """
+        try:
+            if embedded:
+                audio = open_audio(file_path)
+                if not audio:
+                    return None, True
+                
+                for data in iter_embedded_pictures(audio):
+                    img = self._decode_picture(data, size)
+                    if img is not None:
+                        return img, True
             
-            # Method 3: Look for external image files
+            # Method 3: Look for external image files (one folder scan, memoized)
             directory = os.path.dirname(file_path)
+            images = self._folder_images(directory)
+            if images is None:
+                return None, False
+            if not images:
+                return None, True
             base_name = os.path.splitext(os.path.basename(file_path))[0]
             
             # Common album art file names
@@ -334,42 +2837,124 @@ class ImageManager:
                 f'{base_name}.jpg', f'{base_name}.png'
             ]
             
+            confirmed = True
             for art_file in art_files:
-                art_path = os.path.join(directory, art_file)
-                if os.path.exists(art_path):
-                    img = self.load_image(art_path, size)
-                    if img:
-                        self.album_art_cache[cache_key] = img
-                        return img
+                art_path = images.get(art_file.lower())
+                if art_path:
+                    img = self.open_image(art_path, size)
+                    if img is not None:
+                        return img, True
+                    confirmed = False   # unreadable now, maybe fine later
+            return None, confirmed
             
         except Exception as e:
             print(f"Error extracting album art from {file_path}: {e}")
         
-        # Return famous music logo when no album art found
-        return self.default_album_art
+        return None, False
     
-    def _process_album_art(self, img, size, cache_key):
-        """Process and cache album art image"""
-        # Convert to RGB and ensure proper background
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (35, 33, 35))  # Card background color
-            if img.mode == 'RGBA':
-                background.paste(img, mask=img.split()[-1])
+    def album_art_key(self, file_path, size, art=None):
+        """Cache key for a track's album art at a given size"""
+        if art:
+            # Tracks embedding the same cover share one decoded thumbnail
+            return f"art:#{art}_{size[0]}x{size[1]}"
+        return f"art:{file_path}_{size[0]}x{size[1]}"
+    
+    def store_album_art(self, cache_key, img, size):
+        """Wrap a prepared PIL image for display and cache it (main thread)"""
+        return self._store(cache_key, img, size)
+    
+    def _store(self, cache_key, img, size):
+        """Wrap a PIL image as a CTkImage and cache it at its decoded pixel cost"""
+        ctk_image = ctk.CTkImage(light_image=img, dark_image=img, size=size)
+        self.cache.put(cache_key, ctk_image, img.width * img.height * len(img.getbands()))
+        return ctk_image
+
+class ThumbnailService:
+    """Decode and resize album art on worker threads, with a persistent thumbnail cache"""
+    def __init__(self, image_manager, widget, cache_dir="thumbnails", workers=2):
+        self.image_manager = image_manager
+        self.widget = widget
+        self.cache_dir = cache_dir
+        self.pending = {}   # cache key -> callbacks waiting for that thumbnail
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError as e:
+            print(f"Error creating thumbnail cache: {e}")
+    
+    def request(self, file_path, size, callback, art=None):
+        """Return art at once if cached, otherwise the placeholder; callback(image) runs when ready"""
+        cache_key = self.image_manager.album_art_key(file_path, size, art)
+        cached = self.image_manager.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        waiting = self.pending.get(cache_key)
+        if waiting is not None:
+            waiting.append(callback)
+        else:
+            self.pending[cache_key] = [callback]
+            self.executor.submit(self._build_thumbnail, file_path, size, cache_key, art)
+        return self.image_manager.default_album_art
+    
+    def _thumbnail_path(self, file_path, size, art=None):
+        """Disk cache location keyed by cover hash (or source file, mtime and file size) and thumbnail size"""
+        if art:
+            key = f"#{art}|{size[0]}x{size[1]}"
+        else:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                return None
+            key = f"{file_path}|{stat.st_mtime_ns}|{stat.st_size}|{size[0]}x{size[1]}"
+        digest = hashlib.sha1(key.encode('utf-8', 'surrogatepass')).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".jpg")
+    
+    def _build_thumbnail(self, file_path, size, cache_key, art=None):
+        """Worker thread: load a cached thumbnail or decode and resize the art"""
+        img = None
+        try:
+            thumb_path = self._thumbnail_path(file_path, size, art)
+            if thumb_path and os.path.exists(thumb_path):
+                with Image.open(thumb_path) as cached:
+                    img = cached.convert('RGB')
             else:
-                background.paste(img)
-            img = background
+                img = self.image_manager.load_album_art_image(file_path, size, art)
+                if img is not None and thumb_path:
+                    # Write through a temp file so a crash never leaves a torn thumbnail
+                    temp_path = thumb_path + ".tmp"
+                    img.save(temp_path, "JPEG", quality=90)
+                    os.replace(temp_path, thumb_path)
+        except Exception as e:
+            print(f"Error building thumbnail for {file_path}: {e}")
+        
+        try:
+            self.widget.after(0, self._deliver, cache_key, img, size)
+        except Exception:
+            pass  # Window closed while the thumbnail was being built
+    
+    def _deliver(self, cache_key, img, size):
+        """Main thread: wrap the thumbnail and hand it to everyone waiting"""
+        if img is None:
+            image = self.image_manager.default_album_art
         else:
-            img = img.convert('RGB')
+            image = self.image_manager.store_album_art(cache_key, img, size)
         
-        img = img.resize(size, Image.Resampling.LANCZOS)
-        ctk_image = ctk.CTkImage(light_image=img, dark_image=img, size=size)
-        self.album_art_cache[cache_key] = ctk_image
-        return ctk_image
+        for callback in self.pending.pop(cache_key, []):
+            try:
+                callback(image)
+            except Exception as e:
+                print(f"Error displaying thumbnail: {e}")
+    
+    def shutdown(self):
+        """Stop the thumbnail workers"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
 class StudentMediaPlayer(ctk.CTk):
     """Main Student Media Player Application"""
     
     def __init__(self):
+        self.startup_started = time.perf_counter()
         super().__init__()
         
         # Window configuration
@@ -377,18 +2962,23 @@ class StudentMediaPlayer(ctk.CTk):
         self.geometry("1200x700")
         self.minsize(1000, 600)
         
-        # Initialize components
-        self.instance = vlc.Instance()
-        self.player = self.instance.media_player_new()
+        # Initialize components (VLC and the playlist store are created on first use)
+        self._instance = None
+        self._player = None
+        self.player_lock = threading.Lock()
+        self._playlist_manager = None
+        self.playlist_manager_lock = threading.Lock()
         self.image_manager = ImageManager()
+        self.thumbnail_service = ThumbnailService(self.image_manager, self)
         
         # Application state
         self.current_file = None
         self.is_playing = False
-        self.playlist = []
+        # Search index kept in step with the library model (reach it through the model,
+        # which the snapshot restore may swap)
+        self.playlist = LibraryModel(SearchIndex())
         self.current_index = 0
         self.volume = 70
-        self.player.audio_set_volume(self.volume)
         self.is_muted = False
         self.pre_mute_volume = self.volume
         self.is_repeat = False
@@ -397,18 +2987,49 @@ class StudentMediaPlayer(ctk.CTk):
         self.study_timer = StudyTimer()
         self.study_session_active = False
         
-        # Playlist manager
-        self.playlist_manager = PlaylistManager()
+        # Worker pool for tag parsing (process pool helps CPU-heavy FLAC/M4A parsing)
+        self.metadata_workers = None
+        self.use_process_pool = False
+        self.fast_tag_parsing = True
+        # Tag reader and its persistent cache are opened on first use
+        self._metadata_extractor = None
+        self.metadata_lock = threading.Lock()
         
         # Loading flag for large folders
         self.is_loading = False
         self.loading_thread = None
+        self.loading_token = None
+        
+        # Library rows waiting to be inserted into the treeview in batches
+        self.pending_tree_rows = deque()
+        self.tree_flush_scheduled = False
+        self.tree_insert_budget = 0.008  # seconds of insert work per tick
+        
+        # Two-phase import: rows appear with filename titles, tags are filled in behind them
+        self.tag_queue = TagFillQueue()
+        self.tag_update_scheduled = False
+        self.tag_update_interval = 150  # ms between batched row updates
+        self.tag_updates = deque()      # (track, album key before the update) from the fill thread
+        
+        # Library folders watched for new, changed and deleted files
+        self.library_roots = []
+        self.library_watcher = LibraryWatcher(self._on_library_changes)
+        # Watcher diffs are queued and picked up by the main loop, never posted with after()
+        self.library_changes = queue.Queue()
+        self.library_poll_interval = 250  # ms
+        
+        # Library snapshot restored at launch and rewritten when the library changed
+        self.library_snapshot = LibrarySnapshot()
+        self.saved_library = (self.playlist, self.playlist.version)   # (model, version) last written
+        self.known_files = {}   # file signatures from the snapshot, for folders the watcher has not walked yet
+        self.snapshot_interval = 5 * 60 * 1000   # ms between periodic saves
+        self.snapshot_thread = None
         
         # Progress bar control
         self.is_seeking = False
         
-        # Create logo with multiple fallback options
-        self.setup_logo()
+        # Logo is loaded after the first paint
+        self.logo_image = None
         
         # Setup UI
         self.setup_ui()
@@ -419,16 +3040,95 @@ class StudentMediaPlayer(ctk.CTk):
         # Setup tooltips
         self.setup_tooltips()
         
-        # Setup VLC event manager
-        self.setup_vlc_events()
-        
         # Start UI updates
         self.update_ui()
+        self.after(self.library_poll_interval, self._poll_library_changes)
+        
+        # Work that can wait until the window is on screen
+        self.startup_tasks = deque([self._restore_library, self._load_logo, self._load_playlists,
+                                    self._warm_up_player])
+        self.after_idle(self._finish_startup)
+    
+    @property
+    def instance(self):
+        """VLC instance, created on first use (libVLC loads its plugins here)"""
+        with self.player_lock:
+            if self._instance is None:
+                import vlc
+                self._instance = vlc.Instance()
+            return self._instance
+    
+    @property
+    def player(self):
+        """VLC media player, created on first use with the current volume"""
+        instance = self.instance
+        with self.player_lock:
+            if self._player is None:
+                self._player = instance.media_player_new()
+                self._player.audio_set_volume(0 if self.is_muted else self.volume)
+                self.setup_vlc_events()
+            return self._player
+    
+    @property
+    def playlist_manager(self):
+        """Saved playlists, loaded on first use"""
+        with self.playlist_manager_lock:
+            if self._playlist_manager is None:
+                self._playlist_manager = PlaylistManager()
+            return self._playlist_manager
+    
+    @property
+    def metadata_extractor(self):
+        """Tag reader, opened with its metadata cache on first use"""
+        with self.metadata_lock:
+            if self._metadata_extractor is None:
+                # Persistent metadata cache so rescans only parse new or changed files
+                self._metadata_extractor = MetadataExtractor(MetadataCache(),
+                                                             workers=self.metadata_workers,
+                                                             use_processes=self.use_process_pool,
+                                                             on_picture=self.image_manager.remember_picture,
+                                                             fast_tags=self.fast_tag_parsing)
+            return self._metadata_extractor
+    
+    @property
+    def metadata_cache(self):
+        """Persistent metadata cache shared with the tag reader"""
+        return self.metadata_extractor.cache
+    
+    def _finish_startup(self):
+        """Run deferred startup work one step per idle slot once the window is drawn"""
+        if self.startup_started is not None:
+            elapsed = (time.perf_counter() - self.startup_started) * 1000
+            print(f"First paint after {elapsed:.0f} ms")
+            self.startup_started = None
+        if self.startup_tasks:
+            task = self.startup_tasks.popleft()
+            try:
+                task()
+            except Exception as e:
+                print(f"Error during startup: {e}")
+            self.after(10, self._finish_startup)
+    
+    def _load_logo(self):
+        """Load the sidebar logo"""
+        self.setup_logo()
+        self.logo_label.configure(image=self.logo_image)
+    
+    def _load_playlists(self):
+        """Load saved playlists and fill the playlist dropdown if it exists"""
+        names = list(self.playlist_manager.playlists.keys())
+        if self.playlist_dropdown is not None and names:
+            self.playlist_dropdown.configure(values=names)
+    
+    def _warm_up_player(self):
+        """Start libVLC in the background so the first play does not wait for it"""
+        threading.Thread(target=lambda: self.player, daemon=True).start()
     
     def setup_vlc_events(self):
         """Setup VLC event manager for repeat functionality"""
         try:
-            event_manager = self.player.event_manager()
+            import vlc
+            event_manager = self._player.event_manager()
             event_manager.event_attach(vlc.EventType.MediaPlayerEndReached, self._on_media_end)
         except Exception as e:
             print(f"Error setting up VLC events: {e}")
@@ -485,6 +3185,7 @@ class StudentMediaPlayer(ctk.CTk):
         
         if self.logo_image is None:
             print("🔄 Creating placeholder logo...")
+            from PIL import ImageDraw
             img = Image.new('RGB', (64, 64), color=(15, 21, 16))
             draw = ImageDraw.Draw(img)
             
@@ -587,13 +3288,15 @@ class StudentMediaPlayer(ctk.CTk):
         if self.is_muted:
             self.is_muted = False
             self.volume = self.pre_mute_volume
-            self.player.audio_set_volume(self.volume)
+            if self._player is not None:
+                self._player.audio_set_volume(self.volume)
             self.volume_slider.set(self.volume)
             self.mute_btn.configure(text="🔊")
         else:
             self.is_muted = True
             self.pre_mute_volume = self.volume
-            self.player.audio_set_volume(0)
+            if self._player is not None:
+                self._player.audio_set_volume(0)
             self.mute_btn.configure(text="🔇")
     
     def toggle_repeat(self):
@@ -640,8 +3343,8 @@ class StudentMediaPlayer(ctk.CTk):
         logo_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
         logo_frame.pack(fill="x", padx=15, pady=(20, 15))
         
-        if self.logo_image:
-            ctk.CTkLabel(logo_frame, image=self.logo_image, text="").pack(side="left")
+        self.logo_label = ctk.CTkLabel(logo_frame, image=self.logo_image, text="", width=40)
+        self.logo_label.pack(side="left")
         ctk.CTkLabel(logo_frame, text="Student Media Player", 
                     font=ctk.CTkFont(size=16, weight="bold")).pack(side="left", padx=(10, 0))
         
@@ -736,7 +3439,7 @@ class StudentMediaPlayer(ctk.CTk):
         header_frame.grid(row=0, column=0, sticky="ew", padx=20, pady=15)
         
         # Tab view
-        self.tabview = ctk.CTkTabview(header_frame)
+        self.tabview = ctk.CTkTabview(header_frame, command=self._on_tab_changed)
         self.tabview.pack(fill="x")
         
         # Create tabs
@@ -744,15 +3447,29 @@ class StudentMediaPlayer(ctk.CTk):
         self.playlists_tab = self.tabview.add("📋 Playlists")
         self.albums_tab = self.tabview.add("💿 Albums")
         
-        # Setup each tab
+        # Setup the library tab now, the others when first shown
         self.setup_library_tab()
-        self.setup_playlists_tab()
-        self.setup_albums_tab()
+        self.playlist_dropdown = None
+        self.album_grid = None
+        self.pending_tabs = {
+            "📋 Playlists": self.setup_playlists_tab,
+            "💿 Albums": self.setup_albums_tab,
+        }
         
         # Visualizer
         self.visualizer = ModernVisualizer(main_frame, width=800, height=100)
         self.visualizer.grid(row=2, column=0, sticky="ew", padx=20, pady=10)
     
+    def _on_tab_changed(self):
+        """Build a tab the first time it is selected"""
+        self._build_tab(self.tabview.get())
+    
+    def _build_tab(self, name):
+        """Build a deferred tab if it has not been built yet"""
+        setup = self.pending_tabs.pop(name, None)
+        if setup:
+            setup()
+    
     def setup_library_tab(self):
         """Setup the music library tab"""
         # Search bar
@@ -783,30 +3500,35 @@ class StudentMediaPlayer(ctk.CTk):
                  background=[('selected', MintGreenTheme.COLORS["primary"])],
                  foreground=[('selected', MintGreenTheme.COLORS["dark_bg"])])
         
-        columns = ("#", "Title", "Artist", "Album", "Duration", "Path")
-        self.library_tree = ttk.Treeview(library_frame, columns=columns, show="headings", 
-                                        style="Custom.Treeview")
+        # Virtual list backed by self.playlist: only the rows in view exist in Tk
+        columns = ("#", "Title", "Artist", "Album", "Duration")
+        sort_keys = {
+            "#": lambda i: i,
+            "Title": lambda i: self.playlist[i].title.lower(),
+            "Artist": lambda i: self.playlist[i].artist.lower(),
+            "Album": lambda i: self.playlist[i].album.lower(),
+            "Duration": lambda i: self.playlist[i].seconds,
+        }
+        self.library_tree = VirtualTreeview(library_frame, columns, self._library_row_values,
+                                            sort_keys=sort_keys, style="Custom.Treeview")
         
         # Configure columns
-        for col in columns:
-            self.library_tree.heading(col, text=col)
-        
-        self.library_tree.column("#", width=50)
-        self.library_tree.column("Title", width=250)
-        self.library_tree.column("Artist", width=180)
-        self.library_tree.column("Album", width=180)
-        self.library_tree.column("Duration", width=80)
-        self.library_tree.column("Path", width=0, stretch=False)
+        self.library_tree.tree.column("#", width=50)
+        self.library_tree.tree.column("Title", width=250)
+        self.library_tree.tree.column("Artist", width=180)
+        self.library_tree.tree.column("Album", width=180)
+        self.library_tree.tree.column("Duration", width=80)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(library_frame, orient="vertical", command=self.library_tree.yview)
-        self.library_tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.library_tree.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.library_tree.pack(fill="both", expand=True)
+        # Number of playlist entries already reflected in the view
+        self.library_rows_synced = 0
         
         # Bind double-click to play
-        self.library_tree.bind("<Double-1>", self.play_selected_song)
+        self.library_tree.tree.bind("<Double-1>", self.play_selected_song)
+        
+        # Debounced searches run on a worker thread
+        self.search_scheduler = SearchScheduler(self, self._run_library_search,
+                                                self._apply_search_results)
         
         # Right-click context menu
         self.create_context_menu()
@@ -853,28 +3575,11 @@ class StudentMediaPlayer(ctk.CTk):
         albums_frame = ctk.CTkFrame(self.albums_tab)
         albums_frame.pack(fill="both", expand=True, padx=15, pady=15)
         
-        # Create scrollable canvas for albums
-        self.albums_canvas = tk.Canvas(albums_frame, bg=MintGreenTheme.COLORS["dark_bg"], highlightthickness=0)
-        albums_scrollbar = ttk.Scrollbar(albums_frame, orient="vertical", command=self.albums_canvas.yview)
-        
-        self.albums_scrollable_frame = ctk.CTkFrame(self.albums_canvas, fg_color=MintGreenTheme.COLORS["dark_bg"])
-        self.albums_scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.albums_canvas.configure(scrollregion=self.albums_canvas.bbox("all"))
-        )
-        
-        self.albums_canvas.create_window((0, 0), window=self.albums_scrollable_frame, anchor="nw")
-        self.albums_canvas.configure(yscrollcommand=albums_scrollbar.set)
-        
-        self.albums_canvas.pack(side="left", fill="both", expand=True)
-        albums_scrollbar.pack(side="right", fill="y")
-        
-        # Bind mousewheel to scroll
-        self.albums_canvas.bind("<MouseWheel>", self._on_mousewheel)
-    
-    def _on_mousewheel(self, event):
-        """Handle mousewheel scrolling"""
-        self.albums_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        # Virtual grid: only cards near the viewport exist and they are reused on scroll
+        self.album_grid = VirtualAlbumGrid(albums_frame, self.create_album_card, self.fill_album_card,
+                                           fg_color=MintGreenTheme.COLORS["dark_bg"])
+        self.album_grid.pack(fill="both", expand=True)
+        self.update_albums_view()
     
     def create_context_menu(self):
         """Create right-click context menu"""
@@ -882,13 +3587,13 @@ class StudentMediaPlayer(ctk.CTk):
         self.context_menu.add_command(label="Add to Playlist", command=self.add_to_playlist_dialog)
         self.context_menu.add_command(label="Remove from Library", command=self.remove_selected_song)
         
-        self.library_tree.bind("<Button-3>", self.show_context_menu)
+        self.library_tree.tree.bind("<Button-3>", self.show_context_menu)
     
     def show_context_menu(self, event):
         """Show context menu on right-click"""
-        item = self.library_tree.identify_row(event.y)
-        if item:
-            self.library_tree.selection_set(item)
+        index = self.library_tree.key_at(event.y)
+        if index is not None:
+            self.library_tree.select_key(index)
             self.context_menu.post(event.x_root, event.y_root)
     
     def create_player_controls(self):
@@ -1023,12 +3728,22 @@ class StudentMediaPlayer(ctk.CTk):
         )
         
         if files:
+            # Dialogs may use / on Windows; tracks rebuild paths with os.sep
+            files = [normalize_path(file_path) for file_path in files]
+            # Supersede a folder load still running, so it stops feeding the old folder's files
+            self.is_loading = False
+            self.loading_token = None
+            self.hide_loading()
             # Stop current playback immediately
             self.stop_playback()
             # Clear existing playlist and library
+            self.tag_queue.cancel()
             self.playlist.clear()
-            for item in self.library_tree.get_children():
-                self.library_tree.delete(item)
+            self.pending_tree_rows.clear()
+            self.refresh_library_view()
+            self.library_roots = []
+            self.known_files = {}
+            self.library_watcher.set_roots(self.library_roots)
             # Add files and auto-play first one
             self.add_files_to_library(files, auto_play=True)
     
@@ -1037,21 +3752,24 @@ class StudentMediaPlayer(ctk.CTk):
         folder_path = filedialog.askdirectory(title="Select Folder with Audio Files")
         
         if folder_path:
+            folder_path = normalize_path(folder_path)
             # Stop current playback immediately
             self.stop_playback()
             # Clear existing playlist and library
+            self.tag_queue.cancel()
             self.playlist.clear()
-            for item in self.library_tree.get_children():
-                self.library_tree.delete(item)
-            # Scan folder and auto-play first song
+            self.pending_tree_rows.clear()
+            self.refresh_library_view()
+            # Scan folder and auto-play first song, then keep it in sync
             self.scan_folder_async(folder_path, auto_play=True)
     
     def add_files_to_library(self, files, auto_play=False):
         """Add multiple files to library"""
-        added_count = 0
-        for file_path in files:
-            if self.add_song_to_library(file_path):
-                added_count += 1
+        added_paths = []
+        for metadata in self.metadata_extractor.extract_many(files):
+            self.add_metadata_to_library(metadata, added_paths)
+        added_count = len(added_paths)
+        self.playlist_manager.add_many_to_playlist("Main Playlist", added_paths)
         
         self.update_albums_view()
         
@@ -1059,6 +3777,9 @@ class StudentMediaPlayer(ctk.CTk):
         if auto_play and self.playlist:
             self.after(100, lambda: self.play_song(0))
         
+        self.metadata_cache.flush()
+        self.refresh_library_view()
+        
         if added_count > 0:
             self.show_notification(f"Added {added_count} songs to library")
     
@@ -1066,132 +3787,429 @@ class StudentMediaPlayer(ctk.CTk):
         """Scan folder asynchronously"""
         self.show_loading("Scanning folder...")
         
+        # A new scan supersedes any scan still running
         self.is_loading = True
-        self.loading_thread = threading.Thread(target=self._load_folder_thread, args=(folder_path, auto_play))
+        self.loading_token = object()
+        self.tag_queue.cancel()
+        self.tag_queue = TagFillQueue()
+        found_queue = queue.Queue(maxsize=1000)
+        scan_state = {'found': 0}
+        self.loading_thread = threading.Thread(target=self._load_folder_thread,
+                                               args=(found_queue, scan_state, auto_play, self.loading_token))
         self.loading_thread.daemon = True
         self.loading_thread.start()
+        threading.Thread(target=self._fill_tags_thread, args=(self.tag_queue,), daemon=True).start()
+        
+        # The watcher's first walk of the folder is the discovery stage
+        token = self.loading_token
+        self.library_roots = [folder_path]
+        self.known_files = {}
+        self.library_watcher.set_roots(
+            self.library_roots,
+            on_found=lambda paths: self._queue_found_files(paths, found_queue, scan_state, token))
     
-    def _load_folder_thread(self, folder_path, auto_play):
+    def _is_current_load(self, token):
+        """Check whether a folder load is still wanted"""
+        return self.is_loading and self.loading_token is token
+    
+    def _queue_found_files(self, paths, found_queue, scan_state, token):
+        """Discovery stage (watcher thread): feed one folder's paths, or None at the end, into a bounded queue"""
+        for file_path in [None] if paths is None else paths:
+            while self._is_current_load(token):
+                try:
+                    found_queue.put(file_path, timeout=0.1)
+                    if file_path is not None:
+                        scan_state['found'] += 1
+                    break
+                except queue.Full:
+                    continue
+    
+    def _iter_found_files(self, found_queue, token):
+        """Yield discovered paths until the discovery stage finishes"""
+        while self._is_current_load(token):
+            try:
+                file_path = found_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if file_path is None:
+                return
+            yield file_path
+    
+    def _load_folder_thread(self, found_queue, scan_state, auto_play, token=None):
         """Thread function for loading folder"""
+        tag_queue = self.tag_queue
         try:
-            audio_extensions = {'.mp3', '.wav', '.ogg', '.flac', '.m4a', '.aac'}
-            all_files = []
-            
-            # Scan for audio files
-            for root, dirs, files in os.walk(folder_path):
-                if not self.is_loading:
-                    break
-                for file in files:
-                    if any(file.lower().endswith(ext) for ext in audio_extensions):
-                        all_files.append(os.path.join(root, file))
-            
-            total_files = len(all_files)
-            print(f"Found {total_files} audio files")
-            
-            # Process files in batches
+            # Discovery and row insertion overlap; tags are parsed later by the fill thread
             batch_size = 100
-            for i in range(0, total_files, batch_size):
-                if not self.is_loading:
-                    break
-                    
-                batch = all_files[i:i + batch_size]
-                for file_path in batch:
-                    if not self.is_loading:
-                        break
-                    self.add_song_to_library(file_path)
+            processed = 0
+            started_playback = False
+            added_paths = []
+            for file_path in self._iter_found_files(found_queue, token):
+                # Phase one: cached tags or a filename-only row, no parsing
+                entry = self.metadata_extractor.lookup(file_path)
+                if entry is not None and self.add_metadata_to_library(entry[0], added_paths):
+                    metadata, complete = entry
+                    if not complete:
+                        tag_queue.add(metadata)
+                    # Start playing as soon as the first song is in the library
+                    if auto_play and not started_playback:
+                        started_playback = True
+                        self.after(0, self.play_song, 0)
+                processed += 1
                 
-                # Update progress
-                progress = min(1.0, (i + len(batch)) / total_files)
-                self.after(0, self._update_loading_progress, progress, i + len(batch), total_files)
+                # Update progress against the files discovered so far
+                if processed % batch_size == 0 or processed == 1:
+                    # One Main Playlist journal entry per batch
+                    self.playlist_manager.add_many_to_playlist("Main Playlist", added_paths)
+                    added_paths = []
+                    found = max(processed, scan_state['found'])
+                    progress = min(1.0, processed / found)
+                    self.after(0, self._update_loading_progress, progress, processed, found)
             
-            self.after(0, self._folder_loading_complete, total_files, auto_play)
+            if not self._is_current_load(token):
+                return
+            
+            total_files = scan_state['found']
+            print(f"Found {total_files} audio files")
+            self.after(0, self._folder_loading_complete, total_files, auto_play and not started_playback)
             
         except Exception as e:
             self.after(0, lambda: self.show_error(f"Error loading folder: {str(e)}"))
             self.after(0, self.hide_loading)
+        finally:
+            if added_paths:
+                self.playlist_manager.add_many_to_playlist("Main Playlist", added_paths)
+            tag_queue.close()
     
-    def add_song_to_library(self, file_path):
-        """Add a song to the music library"""
+    def _fill_tags_thread(self, tag_queue):
+        """Phase two: parse tags for placeholder rows, visible rows first"""
+        order = deque()
+        
+        def paths():
+            for track in tag_queue:
+                order.append(track)
+                yield track.path
+        
         try:
-            if not os.path.exists(file_path):
-                return False
-            
-            file_size = os.path.getsize(file_path)
-            if file_size < 1024:
-                return False
+            for metadata in self.metadata_extractor.extract_many(paths()):
+                track = order.popleft()
+                old_album = (track.album, track.artist)
+                if metadata is not None and self.playlist.update_tags(track, metadata) is not None:
+                    self.tag_updates.append((track, old_album))
+                    self._schedule_tag_updates()
+        except Exception as e:
+            print(f"Error reading tags: {e}")
+        finally:
+            self.metadata_cache.flush()
+    
+    def _fill_tags_later(self, tracks):
+        """Queue tracks for the background tag fill in a closed batch so its last chunk is read"""
+        # A running folder import closes its own queue when it finishes
+        if self.is_loading:
+            tracks = [track for track in tracks if not self.tag_queue.add(track)]
+        if not tracks:
+            return
+        
+        tag_queue = TagFillQueue()
+        for track in tracks:
+            tag_queue.add(track)
+        tag_queue.close()
+        self.tag_queue = tag_queue
+        threading.Thread(target=self._fill_tags_thread, args=(tag_queue,), daemon=True).start()
+    
+    def _restore_library(self):
+        """Start loading the library snapshot in the background"""
+        threading.Thread(target=self._restore_library_thread, daemon=True).start()
+    
+    def _restore_library_thread(self):
+        """Read the snapshot and build the model and search index off the main thread"""
+        started = time.perf_counter()
+        snapshot = self.library_snapshot.load()
+        if snapshot is None:
+            self._after_main(self._schedule_library_snapshot)
+            return
+        
+        roots, tracks, known, incomplete = snapshot
+        search_index = SearchIndex()
+        model = LibraryModel(search_index)
+        model.extend(tracks)
+        self._after_main(self._apply_restored_library, model, roots, known, incomplete, started)
+        # Rows are on screen already; searches scan until the trigram postings catch up
+        search_index.index_pending()
+    
+    def _after_main(self, callback, *args):
+        """Run a callback on the main thread unless the window is gone"""
+        try:
+            self.after(0, callback, *args)
+        except Exception:
+            pass  # Window closed
+    
+    def _apply_restored_library(self, model, roots, known, incomplete, started):
+        """Main thread: show the restored library unless the user already opened something"""
+        if not self.playlist and not self.is_loading and not self.library_roots:
+            self.playlist = model
+            self.saved_library = (model, model.version)
+            self.refresh_library_view()
+            self.update_albums_view()
             
-            metadata = self.extract_metadata(file_path)
-            if not metadata:
+            # Catch up with files that changed while the app was closed
+            self.library_roots = roots
+            self.known_files = known
+            if roots:
+                self.library_watcher.set_roots(self.library_roots, known)
+            else:
+                # Added files are not watched, so check them once against their stored signatures
+                threading.Thread(target=self._check_restored_files, args=(model, known),
+                                 daemon=True).start()
+            self._fill_tags_later(incomplete)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"Restored {len(model)} tracks from the library snapshot in {elapsed:.0f} ms")
+        self._schedule_library_snapshot()
+    
+    def _check_restored_files(self, model, known):
+        """Stat restored tracks outside any watched folder and queue a diff of those changed or deleted"""
+        changed = []
+        removed = []
+        signatures = {}
+        for track in list(model):
+            if self.playlist is not model:
+                return   # the user opened something else meanwhile
+            try:
+                stat = os.stat(track.path)
+            except OSError:
+                if is_deleted(track.path):
+                    removed.append(track.path)
+                elif track.filename in known.get(track.folder, {}):
+                    # Unplugged or locked, not deleted: keep it as it was
+                    signatures.setdefault(track.folder, {})[track.filename] = known[track.folder][track.filename]
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            signatures.setdefault(track.folder, {})[track.filename] = signature
+            if known.get(track.folder, {}).get(track.filename) != signature:
+                changed.append(track.path)
+        
+        if self.playlist is model:
+            self.known_files = signatures
+            self.library_changes.put((changed, removed))
+    
+    def _schedule_library_snapshot(self):
+        """Save the library every few minutes while it keeps changing"""
+        self.after(self.snapshot_interval, self._periodic_library_snapshot)
+    
+    def _periodic_library_snapshot(self):
+        """Write the snapshot on a worker thread if the library changed since the last one"""
+        if self.snapshot_thread is None or not self.snapshot_thread.is_alive():
+            self.snapshot_thread = self.save_library_snapshot(background=True)
+        self._schedule_library_snapshot()
+    
+    def save_library_snapshot(self, background=False):
+        """Write the library snapshot if the library changed; return the writer thread when in background"""
+        model = self.playlist
+        with model.lock:
+            state = (model, model.version)
+            if state == self.saved_library:
+                return None
+            tracks = list(model)
+        self.saved_library = state
+        
+        watched = self.library_watcher.snapshot
+        known = self.known_files
+        def signature(track):
+            files = watched.get(track.folder)
+            if files is None:
+                files = known.get(track.folder, {})
+            return files.get(track.filename)
+        
+        args = (list(self.library_roots), tracks, signature)
+        if not background:
+            self.library_snapshot.save(*args)
+            return None
+        thread = threading.Thread(target=self.library_snapshot.save, args=args, daemon=True)
+        thread.start()
+        return thread
+    
+    def _on_library_changes(self, changed, removed):
+        """Watcher thread: queue a diff for the main thread"""
+        self.library_changes.put((changed, removed))
+    
+    def _poll_library_changes(self):
+        """Main thread: apply queued watcher diffs"""
+        while True:
+            try:
+                changed, removed = self.library_changes.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                self._apply_library_changes(changed, removed)
+            except Exception as e:
+                print(f"Error applying library changes: {e}")
+        self.after(self.library_poll_interval, self._poll_library_changes)
+    
+    def _apply_library_changes(self, changed, removed):
+        """Apply a watcher diff to the library model, search index and views"""
+        positions = [self.playlist.position_of_path(path) for path in removed]
+        positions = sorted(p for p in positions if p is not None)
+        # One pass over the list for the whole batch instead of a shift per track
+        for song in self.playlist.remove_positions(positions):
+            self.image_manager.forget_art(song.path)
+        self.current_index -= bisect.bisect_left(positions, self.current_index)
+        # Playlists keep their entries, so a file that comes back is still in them
+        
+        refill = []
+        added_paths = []
+        for file_path in changed:
+            self.image_manager.forget_art(file_path)
+            song = self.playlist.get(file_path)
+            if song is not None:
+                refill.append(song)   # edited in place: re-read its tags
+                continue
+            entry = self.metadata_extractor.lookup(file_path)
+            if entry is not None and self.add_metadata_to_library(entry[0], added_paths):
+                if not entry[1]:
+                    refill.append(entry[0])
+        self.playlist_manager.add_many_to_playlist("Main Playlist", added_paths)
+        added = len(added_paths)
+        self._fill_tags_later(refill)
+        
+        if positions:
+            # Removals shift positions, so rebuild the rows in view
+            self.library_tree.clear_selection()
+            self.refresh_library_view()
+        if positions or added:
+            self.update_albums_view()
+    
+    def _schedule_tag_updates(self):
+        """Batch filled-in rows into one view update per interval (safe from any thread)"""
+        if not self.tag_update_scheduled:
+            self.tag_update_scheduled = True
+            try:
+                self.after(self.tag_update_interval, self._apply_tag_updates)
+            except Exception:
+                pass  # Window closed while tags were being read
+    
+    def _apply_tag_updates(self):
+        """Main thread: redraw rows whose tags arrived and steer the fill toward visible rows"""
+        self.tag_update_scheduled = False
+        
+        updated = []
+        changed_albums = set()
+        while self.tag_updates:
+            track, old_album = self.tag_updates.popleft()
+            updated.append(track)
+            changed_albums.add(old_album)
+            changed_albums.add((track.album, track.artist))
+        
+        query = self.search_entry.get().lower()
+        if query:
+            # Re-run the search when a row on screen changed, and once more when the fill is done
+            visible = set(self.library_tree.visible_keys())
+            if not len(self.tag_queue) or any(self.playlist.position_of(track) in visible
+                                              for track in updated):
+                self.search_scheduler.schedule(query)
+        elif self.library_tree.sort_column is not None:
+            self.library_tree.resort()
+        else:
+            self.library_tree.refresh()
+        self.update_albums_view(changed_albums)
+        
+        if self.playlist and 0 <= self.current_index < len(self.playlist):
+            song = self.playlist[self.current_index]
+            if song.path == self.current_file:
+                self.song_title_label.configure(text=song.title)
+                self.song_artist_label.configure(text=song.artist)
+                self.current_song_label.configure(text=f"{song.title}\nby {song.artist}")
+        
+        if len(self.tag_queue):
+            count = len(self.playlist)
+            self.tag_queue.prioritize(self.playlist[key] for key in self.library_tree.visible_keys()
+                                      if key < count)
+    
+    def add_metadata_to_library(self, metadata, main_playlist_paths=None):
+        """Add already extracted song metadata to the music library.
+        
+        Bulk imports pass a list to collect the path in, and add the list to the
+        Main Playlist as one entry instead of one per song.
+        """
+        try:
+            position = self.playlist.add(metadata)
+            if position is None:
                 return False
+            if main_playlist_paths is None:
+                self.playlist_manager.add_to_playlist("Main Playlist", metadata.path)
+            else:
+                main_playlist_paths.append(metadata.path)
             
-            self.playlist.append(metadata)
-            self.playlist_manager.add_to_playlist("Main Playlist", file_path)
-            
-            self.after(0, self._add_song_to_treeview, metadata, len(self.playlist))
+            self.queue_treeview_row(metadata, position + 1)
             
             return True
             
         except Exception as e:
-            print(f"Error loading file {file_path}: {e}")
+            print(f"Error adding song {metadata.path}: {e}")
             return False
     
-    def extract_metadata(self, file_path):
-        """Extract metadata from audio file"""
-        try:
-            audio = File(file_path, easy=True)
-            if not audio:
-                audio = File(file_path)
-            
-            title = "Unknown Title"
-            artist = "Unknown Artist"
-            album = "Unknown Album"
-            duration = "0:00"
-            
-            if audio is not None:
-                if 'title' in audio and audio['title']:
-                    title = audio['title'][0]
-                else:
-                    title = os.path.splitext(os.path.basename(file_path))[0]
-                
-                if 'artist' in audio and audio['artist']:
-                    artist = audio['artist'][0]
-                
-                if 'album' in audio and audio['album']:
-                    album = audio['album'][0]
-                
-                if hasattr(audio.info, 'length') and audio.info.length:
-                    total_seconds = int(audio.info.length)
-                    minutes = total_seconds // 60
-                    seconds = total_seconds % 60
-                    duration = f"{minutes}:{seconds:02d}"
-            
-            return {
-                'path': file_path,
-                'title': title[:100],
-                'artist': artist[:50],
-                'album': album[:50],
-                'duration': duration
-            }
-            
-        except:
-            title = os.path.splitext(os.path.basename(file_path))[0]
-            return {
-                'path': file_path,
-                'title': title[:100],
-                'artist': "Unknown Artist",
-                'album': "Unknown Album",
-                'duration': "0:00"
-            }
+    def queue_treeview_row(self, song_data, index):
+        """Queue a library row for batched insertion (safe from any thread)"""
+        self.pending_tree_rows.append((song_data, index))
+        if not self.tree_flush_scheduled:
+            self.tree_flush_scheduled = True
+            self.after(0, self._flush_treeview_rows)
     
-    def _add_song_to_treeview(self, song_data, index):
-        """Add song to treeview from main thread"""
-        try:
-            self.library_tree.insert("", "end", values=(
-                index, song_data['title'], song_data['artist'], song_data['album'], 
-                song_data['duration'], song_data['path']
-            ))
-        except Exception as e:
-            print(f"Error adding song to treeview: {e}")
+    def _flush_treeview_rows(self):
+        """Add queued rows to the library view on the main thread within a per-tick time budget"""
+        deadline = time.perf_counter() + self.tree_insert_budget
+        query = self.search_entry.get().lower()
+        new_rows = []
+        while self.pending_tree_rows:
+            song_data, index = self.pending_tree_rows.popleft()
+            # Skip rows a full refresh already picked up
+            if index > self.library_rows_synced:
+                self.library_rows_synced = index
+                if not query or self._song_matches(song_data, query):
+                    new_rows.append(index - 1)
+            if time.perf_counter() >= deadline:
+                break
+        
+        if new_rows:
+            self.library_tree.append_rows(new_rows)
+        
+        # Clear the flag before re-checking so rows queued meanwhile are never stranded
+        self.tree_flush_scheduled = False
+        if self.pending_tree_rows:
+            self.tree_flush_scheduled = True
+            self.after(16, self._flush_treeview_rows)
+    
+    def _library_row_values(self, index):
+        """Return the library view columns for a playlist index"""
+        song = self.playlist[index]
+        return (index + 1, song.title, song.artist, song.album, song.duration)
+    
+    def refresh_library_view(self):
+        """Rebuild the library view rows from the playlist and current search"""
+        # Structural changes shift positions, so apply them now and drop queued searches
+        self.search_scheduler.cancel()
+        query = self.search_entry.get().lower()
+        if query:
+            self._apply_search_results(query, self._run_library_search(query))
+        else:
+            self.library_rows_synced = len(self.playlist)
+            self.library_tree.set_rows(range(self.library_rows_synced))
+    
+    def _run_library_search(self, query):
+        """Search worker: return the playlist size and matching positions"""
+        # One read of the model, so its size and index always belong together
+        playlist = self.playlist
+        count = len(playlist)
+        # Songs indexed but not yet in the playlist arrive through the row queue
+        return count, [i for i in playlist.search_index.search(query) if i < count]
+    
+    def _apply_search_results(self, query, results):
+        """Show search results, including songs added while the search ran"""
+        count, rows = results
+        for i in range(count, min(self.library_rows_synced, len(self.playlist))):
+            if self._song_matches(self.playlist[i], query):
+                rows.append(i)
+        self.library_rows_synced = max(count, self.library_rows_synced)
+        self.library_tree.set_rows(rows)
     
     def show_loading(self, message):
         """Show loading indicator"""
@@ -1215,6 +4233,7 @@ class StudentMediaPlayer(ctk.CTk):
     def _folder_loading_complete(self, total_files, auto_play):
         """Handle folder loading completion"""
         self.hide_loading()
+        self.refresh_library_view()
         self.update_albums_view()
         
         # Auto-play first song if requested
@@ -1233,16 +4252,9 @@ class StudentMediaPlayer(ctk.CTk):
     
     def play_selected_song(self, event=None):
         """Play the selected song from library"""
-        selection = self.library_tree.selection()
-        if selection:
-            item = selection[0]
-            values = self.library_tree.item(item, 'values')
-            if values and len(values) > 5:
-                song_path = values[5]
-                for i, song in enumerate(self.playlist):
-                    if song['path'] == song_path:
-                        self.play_song(i)
-                        break
+        index = self.library_tree.selected_key
+        if index is not None:
+            self.play_song(index)
     
     def play_song(self, index):
         """Play song at specified index - FIXED: Visualizer and auto-playback"""
@@ -1252,19 +4264,19 @@ class StudentMediaPlayer(ctk.CTk):
             
             self.current_index = index
             song = self.playlist[index]
-            self.current_file = song['path']
+            self.current_file = song.path
             
             # Load and play media immediately
-            media = self.instance.media_new(song['path'])
+            media = self.instance.media_new(song.path)
             self.player.set_media(media)
             self.player.play()
             self.is_playing = True
             self.play_btn.configure(text="⏸")
             
             # Update UI immediately
-            self.song_title_label.configure(text=song['title'])
-            self.song_artist_label.configure(text=song['artist'])
-            self.current_song_label.configure(text=f"{song['title']}\nby {song['artist']}")
+            self.song_title_label.configure(text=song.title)
+            self.song_artist_label.configure(text=song.artist)
+            self.current_song_label.configure(text=f"{song.title}\nby {song.artist}")
             
             # Reset progress and time
             self.progress_var.set(0)
@@ -1272,7 +4284,7 @@ class StudentMediaPlayer(ctk.CTk):
             
             # Load album art (will show famous music logo if no image)
             self._display_default_art()
-            threading.Thread(target=self._load_album_art, args=(song['path'],), daemon=True).start()
+            self._load_album_art(song.path, song.art)
             
             # Start visualizer immediately - FIXED
             self.after(100, lambda: self.visualizer.update_visualizer(self.player))
@@ -1291,9 +4303,9 @@ class StudentMediaPlayer(ctk.CTk):
     
     def stop_playback(self):
         """Stop current playback safely and immediately"""
-        if self.player:
+        if self._player is not None:
             try:
-                self.player.stop()
+                self._player.stop()
                 self.is_playing = False
                 self.play_btn.configure(text="▶")
                 self.visualizer.stop()  # This will clear the green lines
@@ -1304,14 +4316,11 @@ class StudentMediaPlayer(ctk.CTk):
             except Exception as e:
                 print(f"Error stopping playback: {e}")
     
-    def _load_album_art(self, file_path):
-        """Load album art in background thread"""
-        try:
-            album_art = self.image_manager.extract_album_art(file_path)
-            self.after(0, self._display_album_art, album_art, file_path)
-        except Exception as e:
-            print(f"Error loading album art: {e}")
-            self.after(0, self._display_default_art)
+    def _load_album_art(self, file_path, art=None):
+        """Request album art from the thumbnail service without blocking the UI"""
+        album_art = self.thumbnail_service.request(
+            file_path, (150, 150), lambda image: self._display_album_art(image, file_path), art)
+        self._display_album_art(album_art, file_path)
     
     def _display_album_art(self, album_art, file_path):
         """Display album art from main thread"""
@@ -1365,7 +4374,8 @@ class StudentMediaPlayer(ctk.CTk):
         """Set player volume"""
         if not self.is_muted:
             self.volume = int(float(value))
-            self.player.audio_set_volume(self.volume)
+            if self._player is not None:
+                self._player.audio_set_volume(self.volume)
     
     def start_seeking(self, event):
         """Start seeking"""
@@ -1388,23 +4398,23 @@ class StudentMediaPlayer(ctk.CTk):
         self.is_seeking = False
     
     def search_songs(self, event):
-        """Search songs in library"""
+        """Search songs in library (debounced, matched off the UI thread)"""
         query = self.search_entry.get().lower()
-        
-        for item in self.library_tree.get_children():
-            self.library_tree.delete(item)
-        
-        for i, song in enumerate(self.playlist):
-            if (query in song['title'].lower() or 
-                query in song['artist'].lower() or 
-                query in song['album'].lower()):
-                self.library_tree.insert("", "end", values=(
-                    i + 1, song['title'], song['artist'], song['album'], song['duration'], song['path']
-                ))
+        if query:
+            self.search_scheduler.schedule(query)
+        else:
+            self.refresh_library_view()
+    
+    def _song_matches(self, song, query):
+        """Check whether a song matches a lowercase search query"""
+        return (query in song.title.lower() or 
+                query in song.artist.lower() or 
+                query in song.album.lower())
     
     def show_playlists(self):
         """Switch to playlists tab"""
         self.tabview.set("📋 Playlists")
+        self._build_tab("📋 Playlists")
         self.update_playlists_view()
     
     def create_new_playlist(self):
@@ -1438,38 +4448,34 @@ class StudentMediaPlayer(ctk.CTk):
         """Update the playlists view"""
         for item in self.playlist_tree.get_children():
             self.playlist_tree.delete(item)
+        self.playlist.clear_items()
         
         current_playlist = self.playlist_var.get()
         if current_playlist in self.playlist_manager.playlists:
             for song_path in self.playlist_manager.playlists[current_playlist]:
-                for song in self.playlist:
-                    if song['path'] == song_path:
-                        self.playlist_tree.insert("", "end", values=(
-                            song['title'], song['artist'], song['album'], song['duration']
-                        ))
-                        break
+                song = self.playlist.get(song_path)
+                if song is not None:
+                    item = self.playlist_tree.insert("", "end", values=(
+                        song.title, song.artist, song.album, song.duration
+                    ))
+                    self.playlist.set_item(item, song)
     
     def play_from_playlist(self, event):
         """Play song from playlist"""
         selection = self.playlist_tree.selection()
         if selection:
-            item = selection[0]
-            values = self.playlist_tree.item(item, 'values')
-            if values:
-                title, artist = values[0], values[1]
-                for i, song in enumerate(self.playlist):
-                    if song['title'] == title and song['artist'] == artist:
-                        self.play_song(i)
-                        break
+            song = self.playlist.track_for_item(selection[0])
+            if song is not None:
+                index = self.playlist.position_of(song)
+                if index is not None:
+                    self.play_song(index)
     
     def add_to_playlist_dialog(self):
         """Add selected song to playlist"""
-        selection = self.library_tree.selection()
-        if selection:
-            item = selection[0]
-            values = self.library_tree.item(item, 'values')
-            if values and len(values) > 5:
-                song_path = values[5]
+        index = self.library_tree.selected_key
+        if index is not None:
+            if index < len(self.playlist):
+                song_path = self.playlist[index].path
                 
                 dialog = ctk.CTkInputDialog(text="Enter playlist name:", title="Add to Playlist")
                 playlist_name = dialog.get_input()
@@ -1484,61 +4490,35 @@ class StudentMediaPlayer(ctk.CTk):
     
     def remove_selected_song(self):
         """Remove selected song from library"""
-        selection = self.library_tree.selection()
-        if selection:
-            item = selection[0]
-            values = self.library_tree.item(item, 'values')
-            if values and len(values) > 5:
-                song_path = values[5]
-                
-                self.library_tree.delete(item)
+        index = self.library_tree.selected_key
+        if index is not None:
+            if index < len(self.playlist):
+                song_path = self.playlist[index].path
                 
-                for i, song in enumerate(self.playlist):
-                    if song['path'] == song_path:
-                        del self.playlist[i]
-                        break
+                self.playlist.remove_at(index)
+                if index < self.current_index:
+                    self.current_index -= 1
+                self.library_tree.clear_selection()
+                self.refresh_library_view()
+                self.update_albums_view()
                 
-                for playlist_name in self.playlist_manager.playlists:
-                    self.playlist_manager.remove_from_playlist(playlist_name, song_path)
+                self.playlist_manager.remove_from_all_playlists([song_path])
     
-    def update_albums_view(self):
+    def update_albums_view(self, changed=None):
         """Update the albums view with album art thumbnails"""
-        for widget in self.albums_scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        albums = {}
-        for song in self.playlist:
-            album_key = (song['album'], song['artist'])
-            if album_key not in albums:
-                albums[album_key] = []
-            albums[album_key].append(song)
-        
-        row, col = 0, 0
-        max_cols = 4
-        
-        for (album_name, artist), songs in albums.items():
-            album_frame = self.create_album_card(album_name, artist, songs, row, col)
-            
-            col += 1
-            if col >= max_cols:
-                col = 0
-                row += 1
-        
-        for i in range(max_cols):
-            self.albums_scrollable_frame.grid_columnconfigure(i, weight=1)
-    
-    def create_album_card(self, album_name, artist, songs, row, col):
-        """Create an album card with art and info"""
-        album_frame = ctk.CTkFrame(self.albums_scrollable_frame, 
-                                 width=180, height=220,
+        # Albums are grouped incrementally by the library model; only visible cards are refilled,
+        # and with changed only those whose album moved or is in it
+        if self.album_grid is None:
+            return   # tab not built yet, it fills itself when first shown
+        self.album_grid.set_albums(self.playlist.album_keys(), changed)
+    
+    def create_album_card(self, parent):
+        """Create an empty album card that the grid fills and reuses"""
+        album_frame = ctk.CTkFrame(parent, 
+                                 width=VirtualAlbumGrid.CARD_WIDTH, height=VirtualAlbumGrid.CARD_HEIGHT,
                                  fg_color=MintGreenTheme.COLORS["card_bg"])
-        album_frame.grid(row=row, column=col, padx=10, pady=10, sticky="nsew")
         album_frame.grid_propagate(False)
-        
-        # Album art - will show famous music logo if no image found
-        art_image = None
-        if songs:
-            art_image = self.image_manager.extract_album_art(songs[0]['path'], size=(120, 120))
+        album_frame.pack_propagate(False)
         
         art_frame = ctk.CTkFrame(album_frame, width=140, height=140,
                                fg_color=MintGreenTheme.COLORS["surface"])
@@ -1546,31 +4526,55 @@ class StudentMediaPlayer(ctk.CTk):
         art_frame.pack_propagate(False)
         
         # Always show the famous music logo (Spotify-style) for album art
-        art_label = ctk.CTkLabel(art_frame, image=art_image, text="")
-        art_label.pack(expand=True)
+        album_frame.art_label = ctk.CTkLabel(art_frame, image=None, text="")
+        album_frame.art_label.pack(expand=True)
         
         # Album info
         info_frame = ctk.CTkFrame(album_frame, fg_color="transparent")
         info_frame.pack(fill="x", padx=10, pady=5)
         
-        album_label = ctk.CTkLabel(info_frame, text=self.truncate_text(album_name, 20),
-                                 font=ctk.CTkFont(weight="bold"))
-        album_label.pack()
+        album_frame.album_label = ctk.CTkLabel(info_frame, text="",
+                                             font=ctk.CTkFont(weight="bold"))
+        album_frame.album_label.pack()
         
-        artist_label = ctk.CTkLabel(info_frame, text=self.truncate_text(artist, 20),
-                                  text_color=MintGreenTheme.COLORS["text_muted"])
-        artist_label.pack()
+        album_frame.artist_label = ctk.CTkLabel(info_frame, text="",
+                                              text_color=MintGreenTheme.COLORS["text_muted"])
+        album_frame.artist_label.pack()
         
-        songs_label = ctk.CTkLabel(info_frame, text=f"{len(songs)} song{'s' if len(songs) != 1 else ''}",
-                                 text_color=MintGreenTheme.COLORS["text_secondary"])
-        songs_label.pack()
+        album_frame.songs_label = ctk.CTkLabel(info_frame, text="",
+                                             text_color=MintGreenTheme.COLORS["text_secondary"])
+        album_frame.songs_label.pack()
         
-        # Bind click event
-        album_frame.bind("<Button-1>", lambda e, alb=album_name, art=artist: self.play_album(alb, art))
-        art_frame.bind("<Button-1>", lambda e, alb=album_name, art=artist: self.play_album(alb, art))
+        # Bind click event to whichever album the card currently shows
+        for widget in (album_frame, art_frame, album_frame.art_label):
+            widget.bind("<Button-1>", lambda e, card=album_frame: self.play_album(*card.key))
+        for widget in (album_frame, art_frame, album_frame.art_label, info_frame):
+            self.album_grid.bind_scroll(widget)
         
         return album_frame
     
+    def fill_album_card(self, card, album_key):
+        """Show an album's art and info on a card"""
+        album_name, artist = album_key
+        songs = self.playlist.album_songs(album_name, artist)
+        
+        # Album art - placeholder logo now, real art once a worker has decoded it
+        art_image = None
+        if songs:
+            art_image = self.thumbnail_service.request(
+                songs[0].path, (120, 120),
+                lambda image: self._show_card_art(card, album_key, image), songs[0].art)
+        
+        card.art_label.configure(image=art_image)
+        card.album_label.configure(text=self.truncate_text(album_name, 20))
+        card.artist_label.configure(text=self.truncate_text(artist, 20))
+        card.songs_label.configure(text=f"{len(songs)} song{'s' if len(songs) != 1 else ''}")
+    
+    def _show_card_art(self, card, album_key, image):
+        """Swap in finished art if the card still shows the same album"""
+        if card.key == album_key:
+            card.art_label.configure(image=image)
+    
     def truncate_text(self, text, max_length):
         """Truncate text with ellipsis if too long"""
         if len(text) > max_length:
@@ -1579,11 +4583,10 @@ class StudentMediaPlayer(ctk.CTk):
     
     def play_album(self, album_name, artist):
         """Play the first song from selected album"""
-        album_songs = [i for i, song in enumerate(self.playlist) 
-                      if song['album'] == album_name and song['artist'] == artist]
+        album_songs = self.playlist.album_songs(album_name, artist)
         
         if album_songs:
-            self.play_song(album_songs[0])
+            self.play_song(self.playlist.position_of(album_songs[0]))
             self.show_notification(f"Playing from '{album_name}'")
     
     def toggle_timer(self):
@@ -1656,12 +4659,96 @@ class StudentMediaPlayer(ctk.CTk):
     def on_closing(self):
         """Clean up when closing application"""
         self.is_loading = False
+        if self.snapshot_thread is not None:
+            self.snapshot_thread.join()
+        self.save_library_snapshot()
+        self.tag_queue.cancel()
+        self.library_watcher.stop()
         self.visualizer.stop()
-        self.player.stop()
+        if self._player is not None:
+            self._player.stop()
+        self.search_scheduler.shutdown()
+        self.thumbnail_service.shutdown()
+        print(f"Image cache: {self.image_manager.cache.stats()}")
+        if self._metadata_extractor is not None:
+            self._metadata_extractor.shutdown()
+            self._metadata_extractor.cache.close()
+        if self._playlist_manager is not None:
+            self._playlist_manager.close()
         self.destroy()
 
+def benchmark_tag_reading(folder_path, rounds=3):
+    """Compare files/sec of the mutagen and header-only tag readers on a folder"""
+    files = list(iter_audio_files(folder_path))
+    if not files:
+        print(f"No audio files found in {folder_path}")
+        return
+    print(f"Benchmarking tag reading on {len(files)} files ({rounds} rounds, best shown)")
+    
+    results = {}
+    for name, fast in (("mutagen", False), ("header-only", True)):
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            tracks = [read_tags(file_path, fast)[0] for file_path in files]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = tracks
+        print(f"{name:>12}: {len(files) / best:10.1f} files/sec ({best:.3f}s)")
+    
+    # Check the fast path agrees with mutagen
+    fallbacks = sum(1 for file_path in files if read_tags_fast(file_path) is None)
+    mismatches = []
+    for slow, fast in zip(results["mutagen"], results["header-only"]):
+        slow_values = (slow.title, slow.artist, slow.album, slow.seconds, slow.art)
+        fast_values = (fast.title, fast.artist, fast.album, fast.seconds, fast.art)
+        if slow_values != fast_values:
+            mismatches.append((slow.path, slow_values, fast_values))
+    
+    print(f"Fell back to mutagen for {fallbacks} files, {len(mismatches)} results differ")
+    for path, slow_values, fast_values in mismatches[:10]:
+        print(f"  {path}\n    mutagen:     {slow_values}\n    header-only: {fast_values}")
+
+def report_import_times(limit=25):
+    """Import this script in a fresh interpreter under -X importtime and list the slowest modules"""
+    code = f"import runpy; runpy.run_path({os.path.abspath(__file__)!r}, run_name='import_check')"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True)
+    
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        timings.append((int(parts[1]), int(parts[0]), parts[2].rstrip()))
+    
+    if not timings:
+        print(f"No import timings collected: {result.stderr.strip()[-500:]}")
+        return
+    
+    total = sum(own for _, own, _ in timings)
+    top_level = sum(cumulative for cumulative, _, name in timings if not name.startswith("  "))
+    print(f"{len(timings)} modules imported, {total / 1000:.1f} ms in imports "
+          f"({top_level / 1000:.1f} ms for top-level imports)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative, own, name in sorted(timings, reverse=True)[:limit]:
+        print(f"{cumulative / 1000:14.1f} {own / 1000:9.1f}  {name.strip()}")
+
 def main():
     """Main application entry point"""
+    # python "Student Media player.py" --bench-tags FOLDER
+    if len(sys.argv) > 2 and sys.argv[1] == "--bench-tags":
+        benchmark_tag_reading(sys.argv[2])
+        return
+    
+    # python "Student Media player.py" --import-times
+    if len(sys.argv) > 1 and sys.argv[1] == "--import-times":
+        report_import_times()
+        return
+    
     app = StudentMediaPlayer()
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
     
@@ -1672,4 +4759,6 @@ def main():
     app.mainloop()
 
 if __name__ == "__main__":
+    # Needed for the optional metadata process pool in the packaged executable
+    multiprocessing.freeze_support()
     main()